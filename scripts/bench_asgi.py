@@ -0,0 +1,148 @@
+"""
+Compare the work session list under WSGI and ASGI at high concurrency:
+the sync view behind gunicorn threads, the sync view behind uvicorn, and the
+async view behind uvicorn.
+
+Usage: python scripts/bench_asgi.py [concurrency] [seconds]
+
+Needs gunicorn and uvicorn, which are not requirements of the app. Uses the
+same environment variables as the app; the user and sessions of the
+benchmark are deleted afterwards. The load is generated with asyncio over
+keep-alive connections, so the client does not need a thread per connection
+either.
+
+Under ASGI every request in flight holds its own database connection, so run
+it with POSTGRES_POOL=True to stay below max_connections of the server.
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+CONCURRENCY = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+SECONDS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+SESSIONS = 200
+HOST = '127.0.0.1'
+PORT = 8765
+
+SERVERS = {
+    'WSGI, gunicorn 1 worker x 32 threads': (
+        ['gunicorn', 'wtt.wsgi', '-k', 'gthread', '-w', '1', '--threads', '32', '-b', f'{HOST}:{PORT}'],
+        '/api/work_sessions/',
+    ),
+    'ASGI, uvicorn 1 worker, sync view': (
+        ['uvicorn', 'wtt.asgi:application', '--host', HOST, '--port', str(PORT), '--no-access-log'],
+        '/api/work_sessions/',
+    ),
+    'ASGI, uvicorn 1 worker, async view': (
+        ['uvicorn', 'wtt.asgi:application', '--host', HOST, '--port', str(PORT), '--no-access-log'],
+        '/api/work_sessions/async/',
+    ),
+}
+
+
+def create_fixtures():
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wtt.settings')
+
+    import django
+    django.setup()
+
+    import datetime as dt
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from wtt.work_sessions.models import WorkSession
+
+    user = get_user_model().objects.create_user(f'bench-{uuid.uuid4().hex[:8]}')
+    token = Token.objects.create(user=user)
+    started_at = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    WorkSession.objects.bulk_create(
+        WorkSession(
+            owner=user,
+            started_at=started_at + dt.timedelta(hours=4 * i),
+            ended_at=started_at + dt.timedelta(hours=4 * i + 1),
+            duration=60,
+        )
+        for i in range(SESSIONS)
+    )
+    return user, token.key
+
+
+async def client(path, token, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    request = (
+        f'GET {path}?limit=20 HTTP/1.1\r\nHost: {HOST}\r\n'
+        f'Authorization: Token {token}\r\nConnection: keep-alive\r\n\r\n'
+    ).encode()
+
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(request)
+            status = await reader.readline()
+            headers = {}
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                name, _, value = line.decode().partition(':')
+                headers[name.strip().lower()] = value.strip()
+            await reader.readexactly(int(headers.get('content-length', 0)))
+
+            if b' 200 ' not in status:
+                errors.append(status)
+            latencies.append(time.perf_counter() - started)
+
+            if headers.get('connection') == 'close':
+                writer.close()
+                reader, writer = await asyncio.open_connection(HOST, PORT)
+    finally:
+        writer.close()
+
+
+async def load(path, token):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + SECONDS
+    await asyncio.gather(*(client(path, token, deadline, latencies, errors) for _ in range(CONCURRENCY)))
+    return latencies, errors
+
+
+def wait_for_server():
+    for _ in range(100):
+        try:
+            asyncio.run(asyncio.wait_for(asyncio.open_connection(HOST, PORT), 1))
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('The server has not started.')
+
+
+def main():
+    user, token = create_fixtures()
+    print(f'{CONCURRENCY} connections, {SECONDS} seconds each')
+
+    try:
+        for name, (command, path) in SERVERS.items():
+            server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for_server()
+                latencies, errors = asyncio.run(load(path, token))
+            finally:
+                server.terminate()
+                server.wait()
+
+            latencies.sort()
+            print(
+                f'{name:<40} {len(latencies) / SECONDS:>7.0f} requests/sec'
+                f'  p50 {statistics.median(latencies) * 1000:>6.0f} ms'
+                f'  p99 {latencies[int(len(latencies) * 0.99)] * 1000:>6.0f} ms'
+                f'  errors {len(errors)}'
+            )
+    finally:
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
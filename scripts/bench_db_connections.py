@@ -0,0 +1,112 @@
+"""
+Compare requests/sec of the work session list with different database
+connection settings: a new connection per request, persistent connections,
+a psycopg pool, each with and without server-side prepared statements.
+
+Usage: python scripts/bench_db_connections.py [requests] [threads]
+
+Uses the same environment variables as the app. Every configuration is run
+in its own process, since the settings are read once at startup. Requests go
+through the WSGI handler from a fixed set of threads, like the threads of an
+application server, so connections are closed or kept as they would be in
+production. The user and sessions of the benchmark are deleted afterwards.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+SESSIONS = 200
+
+CONFIGS = {
+    'new connection per request': {'POSTGRES_POOL': 'False', 'POSTGRES_CONN_MAX_AGE': '0'},
+    'persistent connections': {'POSTGRES_POOL': 'False', 'POSTGRES_CONN_MAX_AGE': '60'},
+    'pool': {'POSTGRES_POOL': 'True', 'POSTGRES_POOL_MAX_SIZE': str(THREADS)},
+}
+PATHS = [
+    '/api/work_sessions/?limit=50',
+    '/api/work_sessions/?limit=50&started_at=2025-01-15T00:00:00Z',
+    '/api/work_sessions/?limit=50&search=note',
+]
+
+
+def run_all():
+    print(f'{REQUESTS} requests, {THREADS} threads')
+    for name, env in CONFIGS.items():
+        for binding in ('False', 'True'):
+            child_env = {**os.environ, **env, 'POSTGRES_SERVER_SIDE_BINDING': binding, 'BENCH_CHILD': '1'}
+            result = subprocess.run(
+                [sys.executable, __file__, str(REQUESTS), str(THREADS)],
+                env=child_env, capture_output=True, text=True, check=True,
+            )
+            prepared = 'prepared' if binding == 'True' else 'not prepared'
+            print(f'{name + ", " + prepared:<45} {result.stdout.strip()} requests/sec')
+
+
+def run_one():
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wtt.settings')
+
+    import django
+    django.setup()
+
+    import datetime as dt
+
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.test import RequestFactory
+    from rest_framework.authtoken.models import Token
+
+    from wtt.work_sessions.models import WorkSession
+
+    user = get_user_model().objects.create_user(f'bench-{uuid.uuid4().hex[:8]}')
+    token = Token.objects.create(user=user)
+    started_at = dt.datetime(2025, 1, 1, tzinfo=dt.timezone.utc)
+    WorkSession.objects.bulk_create(
+        WorkSession(
+            owner=user,
+            started_at=started_at + dt.timedelta(hours=4 * i),
+            ended_at=started_at + dt.timedelta(hours=4 * i + 1),
+            duration=60,
+            note=f'bench note {i}',
+        )
+        for i in range(SESSIONS)
+    )
+    connection.close()
+
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    environs = [factory.get(path, HTTP_AUTHORIZATION=f'Token {token.key}').environ for path in PATHS]
+
+    def start_response(status, headers):
+        assert status.startswith('200'), status
+
+    def work(count):
+        for i in range(count):
+            response = handler(dict(environs[i % len(environs)]), start_response)
+            b''.join(response)
+            # Sends request_finished, which closes the connection unless it is persistent.
+            response.close()
+
+    threads = [threading.Thread(target=work, args=(REQUESTS // THREADS,)) for _ in range(THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    user.delete()
+    print(f'{REQUESTS // THREADS * THREADS / elapsed:.0f}')
+
+
+if __name__ == '__main__':
+    if os.environ.get('BENCH_CHILD'):
+        run_one()
+    else:
+        run_all()
@@ -0,0 +1,105 @@
+"""
+Count the updates of sessions that are HOT (heap-only tuples, which write
+no index entry) with and without the (owner, updated_at, id) index of the
+change feed, and how much the indexes grow with the updates.
+
+Usage: python scripts/bench_hot_updates.py [rows]
+
+Uses the same POSTGRES_* environment variables as the app and works in a
+temporary table with the indexes of wtt_work_session, so nothing is left
+behind in the database; the pg_trgm and btree_gist extensions must be
+installed. Pages are filled to 90%, as a vacuumed table has free space for
+updated rows. A tenth of the rows is updated by each kind of update.
+"""
+import os
+import sys
+
+import psycopg
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+config = {
+    'dbname': os.environ['POSTGRES_DATABASE_NAME'],
+    'user': os.environ['POSTGRES_USER'],
+    'password': os.environ['POSTGRES_PASSWORD'],
+    'host': os.environ['POSTGRES_HOST'],
+    'port': os.environ['POSTGRES_PORT'],
+}
+
+INDEXES = [
+    ('bench_note_trgm_gin', 'USING gin (note gin_trgm_ops)'),
+    ('bench_note_vector_gin', 'USING gin (note_vector)'),
+    ('bench_owner_started_at_idx', '(owner_id, started_at DESC)'),
+    ('bench_owner_running_idx', '(owner_id) WHERE ended_at IS NULL'),
+    ('bench_owner_period_gist', 'USING gist (owner_id, period)'),
+]
+UPDATED_AT_INDEX = ('bench_owner_updated_at_idx', '(owner_id, updated_at, id)')
+
+# Each kind of update is made to the rows whose id modulo 10 is its key.
+UPDATES = {
+    # Labels added or removed: signals.py bumps updated_at only.
+    'labels changed': (0, 'updated_at = clock_timestamp()'),
+    # A note patched: both indexes on the note change too.
+    'note patched': (1, "note = note || ' patched', updated_at = clock_timestamp()"),
+    # A running session ended: the period and the running index change too.
+    'ended': (2, "ended_at = started_at + interval '1 hour', duration = 60, updated_at = clock_timestamp()"),
+}
+
+
+def create_table(curs, indexes):
+    curs.execute(
+        "CREATE TEMPORARY TABLE bench_sessions ("
+        "id bigserial PRIMARY KEY, owner_id integer NOT NULL, "
+        "started_at timestamptz NOT NULL, ended_at timestamptz, duration integer, "
+        "updated_at timestamptz NOT NULL DEFAULT clock_timestamp(), note text NOT NULL, "
+        "note_vector tsvector GENERATED ALWAYS AS (to_tsvector('english'::regconfig, note)) STORED, "
+        "period tstzrange GENERATED ALWAYS AS (tstzrange(started_at, ended_at)) STORED"
+        ") WITH (fillfactor = 90)"
+    )
+    for name, definition in indexes:
+        curs.execute(f'CREATE INDEX {name} ON bench_sessions {definition}')
+
+    # The rows updated by "ended" are running, the others have ended.
+    curs.execute(
+        "INSERT INTO bench_sessions (owner_id, started_at, ended_at, duration, note) "
+        "SELECT i %% 100, start, CASE WHEN i %% 10 = 2 THEN NULL ELSE start + interval '1 hour' END, "
+        "CASE WHEN i %% 10 = 2 THEN NULL ELSE 60 END, 'Session ' || i || ' of the benchmark' "
+        "FROM (SELECT i, timestamptz '2000-01-01' + i * interval '1 hour' AS start "
+        "FROM generate_series(1, %s) AS i) AS sessions",
+        [ROWS],
+    )
+
+
+def get_index_size(curs):
+    curs.execute(
+        "SELECT sum(pg_relation_size(indexrelid)) FROM pg_index WHERE indrelid = 'bench_sessions'::regclass"
+    )
+    return curs.fetchone()[0]
+
+
+def bench(conn, indexes):
+    print(f'With {len(indexes) + 1} indexes, including the primary key:')
+    with conn.transaction(force_rollback=True), conn.cursor() as curs:
+        create_table(curs, indexes)
+        size = get_index_size(curs)
+
+        for name, (key, assignments) in UPDATES.items():
+            curs.execute(
+                "SELECT pg_stat_get_xact_tuples_updated('bench_sessions'::regclass), "
+                "pg_stat_get_xact_tuples_hot_updated('bench_sessions'::regclass)"
+            )
+            updated, hot = curs.fetchone()
+            curs.execute(f'UPDATE bench_sessions SET {assignments} WHERE id %% 10 = %s', [key])
+            curs.execute(
+                "SELECT pg_stat_get_xact_tuples_updated('bench_sessions'::regclass), "
+                "pg_stat_get_xact_tuples_hot_updated('bench_sessions'::regclass)"
+            )
+            updated, hot = (total - before for total, before in zip(curs.fetchone(), (updated, hot)))
+            print(f'{name:>16}: {updated:>8,} updates, {hot / updated:>4.0%} HOT')
+
+        print(f'{"indexes grew by":>16}: {(get_index_size(curs) - size) / 2**20:>8,.1f} MiB')
+
+
+with psycopg.connect(**config) as conn:
+    bench(conn, INDEXES + [UPDATED_AT_INDEX])
+    bench(conn, INDEXES)
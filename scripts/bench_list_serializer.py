@@ -0,0 +1,100 @@
+"""
+Compare the serialization of a page of the work session list with
+WorkSessionSerializer, from model instances with prefetched labels, and with
+serialize_work_session_rows(), from rows of values, including the queries
+and the rendering to JSON.
+
+Usage: python scripts/bench_list_serializer.py [labels per session]
+
+Uses the same environment variables as the app. The user, sessions and
+labels of the benchmark are created in a transaction that is rolled back,
+so nothing is left behind in the database.
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'wtt.settings')
+
+import django  # noqa: E402
+django.setup()
+
+import datetime as dt  # noqa: E402
+
+from django.db import transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from wtt.work_sessions.models import WorkSession, WorkSessionLabel  # noqa: E402
+from wtt.work_sessions.serializers import (  # noqa: E402
+    WORK_SESSION_VALUES, WorkSessionSerializer, serialize_work_session_rows,
+)
+
+SIZES = [50, 500, 5000]
+LABELS_PER_SESSION = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+RUNS = 7
+
+
+def create_fixtures():
+    user = get_user_model().objects.create_user('bench list serializer')
+    labels = WorkSessionLabel.objects.bulk_create(
+        WorkSessionLabel(owner=user, name=f'label {i}') for i in range(10)
+    )
+
+    # started_at is set to the current time on creation.
+    now = timezone.now()
+    sessions = WorkSession.objects.bulk_create(
+        WorkSession(
+            owner=user,
+            ended_at=now + dt.timedelta(hours=1, minutes=i),
+            duration=i,
+            note=f'Session {i} of the benchmark.',
+        )
+        for i in range(max(SIZES))
+    )
+
+    through = WorkSession.labels.through
+    through.objects.bulk_create(
+        through(worksession_id=ws.pk, worksessionlabel_id=labels[(i + j) % len(labels)].pk)
+        for i, ws in enumerate(sessions)
+        for j in range(LABELS_PER_SESSION)
+    )
+    return user
+
+
+def serialize_instances(queryset):
+    return JSONRenderer().render(WorkSessionSerializer(queryset.prefetch_related('labels'), many=True).data)
+
+
+def serialize_rows(queryset):
+    return JSONRenderer().render(serialize_work_session_rows(queryset.values(*WORK_SESSION_VALUES)))
+
+
+def bench(function, queryset):
+    runs = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        function(queryset)
+        runs.append(time.perf_counter() - started)
+    return statistics.median(runs)
+
+
+with transaction.atomic():
+    user = create_fixtures()
+    print(f'Median of {RUNS} runs, {LABELS_PER_SESSION} labels per session:')
+
+    for size in SIZES:
+        queryset = WorkSession.objects.filter(owner=user)[:size]
+        assert serialize_instances(queryset) == serialize_rows(queryset)
+
+        instances = bench(serialize_instances, queryset)
+        rows = bench(serialize_rows, queryset)
+        print(
+            f'{size:>5} sessions: serializer {instances * 1000:>8.1f} ms, '
+            f'rows {rows * 1000:>8.1f} ms, {instances / rows:.1f}x'
+        )
+
+    transaction.set_rollback(True)
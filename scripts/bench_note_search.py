@@ -0,0 +1,128 @@
+"""
+Compare the search of notes with the trigram index (note_trgm_gin) and with
+the full-text index (note_vector_gin), in each mode of search.py.
+
+Usage: python scripts/bench_note_search.py [rows]
+
+Uses the same POSTGRES_* environment variables as the app and works in a
+temporary table, so nothing is left behind in the database. The notes are
+random sentences of up to 1000 characters; each query fetches the first
+page of 50 results, as the list does. Queries are stopped after TIMEOUT
+seconds.
+"""
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+import psycopg
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+RUNS = 3
+TIMEOUT = 60
+TERMS = ['meeting', 'refactoring', 'deployment review', 'meetng']
+
+config = {
+    'dbname': os.environ['POSTGRES_DATABASE_NAME'],
+    'user': os.environ['POSTGRES_USER'],
+    'password': os.environ['POSTGRES_PASSWORD'],
+    'host': os.environ['POSTGRES_HOST'],
+    'port': os.environ['POSTGRES_PORT'],
+    'autocommit': True,
+}
+
+WORDS = (
+    'meeting meetings planning review reviewed deployment deploying refactoring tests testing docs '
+    'writing bug bugs fixing customer support call calls design sprint standup interview hiring '
+    'research reading notes database index query migration release hotfix lunch break email'
+).split()
+
+QUERIES = {
+    'trigram': (
+        "SELECT id FROM bench_notes WHERE %(search)s <%% note ORDER BY started_at DESC LIMIT 50"
+    ),
+    'fts': (
+        "SELECT id FROM bench_notes WHERE note_vector @@ websearch_to_tsquery('english', %(search)s) "
+        "ORDER BY ts_rank(note_vector, websearch_to_tsquery('english', %(search)s)) DESC, started_at DESC LIMIT 50"
+    ),
+    'hybrid': (
+        "SELECT id FROM bench_notes "
+        "WHERE note_vector @@ websearch_to_tsquery('english', %(search)s) OR %(search)s <%% note "
+        "ORDER BY ts_rank(note_vector, websearch_to_tsquery('english', %(search)s)) "
+        "+ word_similarity(%(search)s, note) DESC, started_at DESC LIMIT 50"
+    ),
+    'fts with highlight': (
+        "SELECT id, ts_headline('english', note, websearch_to_tsquery('english', %(search)s)) FROM bench_notes "
+        "WHERE note_vector @@ websearch_to_tsquery('english', %(search)s) "
+        "ORDER BY ts_rank(note_vector, websearch_to_tsquery('english', %(search)s)) DESC, started_at DESC LIMIT 50"
+    ),
+}
+
+
+def generate_vocabulary(rng, size=20_000):
+    # The real words are the most frequent ones, followed by random ones,
+    # with Zipf-like weights.
+    words = WORDS + [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(3, 10))) for _ in range(size)]
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, cum_weights
+
+
+def generate_note(rng, words, cum_weights):
+    return ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(3, 150)))[:1000]
+
+
+def create_table(conn):
+    rng = random.Random(0)
+    words, cum_weights = generate_vocabulary(rng)
+    with conn.cursor() as curs:
+        curs.execute(
+            "CREATE TEMPORARY TABLE bench_notes ("
+            "id bigserial PRIMARY KEY, started_at timestamptz NOT NULL DEFAULT now(), note text NOT NULL, "
+            "note_vector tsvector GENERATED ALWAYS AS (to_tsvector('english'::regconfig, note)) STORED)"
+        )
+
+        started = time.perf_counter()
+        with curs.copy('COPY bench_notes (note) FROM STDIN') as copy:
+            for _ in range(ROWS):
+                copy.write_row((generate_note(rng, words, cum_weights),))
+        print(f'Loaded {ROWS:,} notes in {time.perf_counter() - started:.0f}s.')
+
+        for name, definition in [
+            ('note_trgm_gin', 'gin (note gin_trgm_ops)'),
+            ('note_vector_gin', 'gin (note_vector)'),
+        ]:
+            started = time.perf_counter()
+            curs.execute(f'CREATE INDEX {name} ON bench_notes USING {definition}')
+            curs.execute(f"SELECT pg_relation_size('{name}')")
+            size = curs.fetchone()[0]
+            print(f'{name}: built in {time.perf_counter() - started:.0f}s, {size / 2**20:,.0f} MiB')
+
+        curs.execute('ANALYZE bench_notes')
+
+
+def bench(conn, name, query):
+    timings = {}
+    with conn.cursor() as curs:
+        curs.execute(f"SET statement_timeout = '{TIMEOUT}s'")
+        for search in TERMS:
+            runs = []
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                try:
+                    curs.execute(query, {'search': search})
+                except psycopg.errors.QueryCanceled:
+                    break
+                curs.fetchall()
+                runs.append(time.perf_counter() - started)
+            timings[search] = f'{statistics.median(runs) * 1000:>8.1f} ms' if runs else f'> {TIMEOUT} s'.rjust(11)
+
+    print(f'{name:>20}: ' + '  '.join(f'{search!r} {timing}' for search, timing in timings.items()))
+
+
+with psycopg.connect(**config) as conn:
+    create_table(conn)
+    print(f'Median of {RUNS} runs per term:')
+    for name, query in QUERIES.items():
+        bench(conn, name, query)
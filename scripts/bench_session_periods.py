@@ -0,0 +1,125 @@
+"""
+Compare the lookups of sessions by time with the (owner, started_at) index
+and with the GiST index on (owner, period), for one owner with many
+sessions.
+
+Usage: python scripts/bench_session_periods.py [rows]
+
+Uses the same POSTGRES_* environment variables as the app and works in a
+temporary table, so nothing is left behind in the database; the btree_gist
+extension must be installed (migration 0018). Sessions last up to two hours
+and start every half an hour on average, so some of them overlap.
+"""
+import os
+import statistics
+import sys
+import time
+
+import psycopg
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+RUNS = 5
+
+config = {
+    'dbname': os.environ['POSTGRES_DATABASE_NAME'],
+    'user': os.environ['POSTGRES_USER'],
+    'password': os.environ['POSTGRES_PASSWORD'],
+    'host': os.environ['POSTGRES_HOST'],
+    'port': os.environ['POSTGRES_PORT'],
+    'autocommit': True,
+}
+
+# The middle of the sessions, so the queries do not favour either end of
+# the indexes.
+MOMENT = "(SELECT started_at FROM bench_sessions ORDER BY started_at OFFSET {} LIMIT 1)".format(ROWS // 2)
+
+QUERIES = {
+    'active_at, started_at index': (
+        'SELECT id FROM bench_sessions WHERE owner_id = 1 '
+        'AND started_at <= %(at)s AND (ended_at > %(at)s OR ended_at IS NULL) '
+        'ORDER BY started_at DESC LIMIT 50'
+    ),
+    'active_at, period index': (
+        'SELECT id FROM bench_sessions WHERE owner_id = 1 AND period @> %(at)s '
+        'ORDER BY started_at DESC LIMIT 50'
+    ),
+    'overlaps a day, started_at index': (
+        "SELECT id FROM bench_sessions WHERE owner_id = 1 "
+        "AND started_at < %(at)s + interval '1 day' AND (ended_at > %(at)s OR ended_at IS NULL) "
+        "ORDER BY started_at DESC LIMIT 50"
+    ),
+    'overlaps a day, period index': (
+        "SELECT id FROM bench_sessions WHERE owner_id = 1 "
+        "AND period && tstzrange(%(at)s, %(at)s + interval '1 day') "
+        "ORDER BY started_at DESC LIMIT 50"
+    ),
+    'overlaps report, first page': (
+        'SELECT s.id, o.id, lower(s.period * o.period), upper(s.period * o.period) '
+        'FROM bench_sessions s JOIN bench_sessions o '
+        'ON o.owner_id = 1 AND o.period && s.period AND (o.started_at, o.id) < (s.started_at, s.id) '
+        'WHERE s.owner_id = 1 '
+        'ORDER BY s.started_at DESC, s.id DESC, o.started_at DESC, o.id DESC LIMIT 101'
+    ),
+    'overlaps report, a day back': (
+        'SELECT s.id, o.id, lower(s.period * o.period), upper(s.period * o.period) '
+        'FROM bench_sessions s JOIN bench_sessions o '
+        'ON o.owner_id = 1 AND o.period && s.period AND (o.started_at, o.id) < (s.started_at, s.id) '
+        "WHERE s.owner_id = 1 AND s.started_at < %(at)s AND s.started_at >= %(at)s - interval '1 day' "
+        'ORDER BY s.started_at DESC, s.id DESC, o.started_at DESC, o.id DESC LIMIT 101'
+    ),
+}
+
+
+def create_table(conn):
+    with conn.cursor() as curs:
+        curs.execute(
+            "CREATE TEMPORARY TABLE bench_sessions ("
+            "id bigserial PRIMARY KEY, owner_id integer NOT NULL, "
+            "started_at timestamptz NOT NULL, ended_at timestamptz, "
+            "period tstzrange GENERATED ALWAYS AS (tstzrange(started_at, ended_at)) STORED)"
+        )
+
+        started = time.perf_counter()
+        # A few sessions of other owners between those of the owner.
+        curs.execute(
+            "INSERT INTO bench_sessions (owner_id, started_at, ended_at) "
+            "SELECT CASE WHEN i %% 10 = 0 THEN 2 ELSE 1 END, start, "
+            "CASE WHEN i = %(rows)s THEN NULL ELSE start + random() * interval '2 hours' END "
+            "FROM (SELECT i, timestamptz '2000-01-01' + (i + random()) * interval '30 minutes' AS start "
+            "FROM generate_series(1, %(rows)s) AS i) AS sessions",
+            {'rows': ROWS},
+        )
+        print(f'Loaded {ROWS:,} sessions in {time.perf_counter() - started:.0f}s.')
+
+        for name, definition in [
+            ('bench_owner_started_at_idx', '(owner_id, started_at DESC)'),
+            ('bench_owner_period_gist', 'USING gist (owner_id, period)'),
+        ]:
+            started = time.perf_counter()
+            curs.execute(f'CREATE INDEX {name} ON bench_sessions {definition}')
+            curs.execute(f"SELECT pg_relation_size('{name}')")
+            size = curs.fetchone()[0]
+            print(f'{name}: built in {time.perf_counter() - started:.0f}s, {size / 2**20:,.0f} MiB')
+
+        curs.execute('ANALYZE bench_sessions')
+        curs.execute(MOMENT)
+        return curs.fetchone()[0]
+
+
+def bench(conn, name, query, at):
+    runs = []
+    with conn.cursor() as curs:
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            curs.execute(query, {'at': at})
+            curs.fetchall()
+            runs.append(time.perf_counter() - started)
+
+    print(f'{name:>35}: {statistics.median(runs) * 1000:>8.1f} ms')
+
+
+with psycopg.connect(**config) as conn:
+    at = create_table(conn)
+    print(f'Median of {RUNS} runs:')
+    for name, query in QUERIES.items():
+        bench(conn, name, query, at)
@@ -0,0 +1,52 @@
+"""
+Compare insert throughput and primary key index size of uuid4 and uuid7 keys.
+
+Usage: python scripts/bench_uuid_keys.py [rows]
+
+Uses the same POSTGRES_* environment variables as the app and works in
+temporary tables, so nothing is left behind in the database.
+"""
+import os
+import sys
+import time
+import uuid
+
+import psycopg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from wtt.work_sessions.uuids import uuid7  # noqa: E402
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+BATCH_SIZE = 10_000
+
+config = {
+    'dbname': os.environ['POSTGRES_DATABASE_NAME'],
+    'user': os.environ['POSTGRES_USER'],
+    'password': os.environ['POSTGRES_PASSWORD'],
+    'host': os.environ['POSTGRES_HOST'],
+    'port': os.environ['POSTGRES_PORT'],
+}
+
+
+def bench(conn, table, generate):
+    with conn.cursor() as curs:
+        curs.execute(f'CREATE TEMPORARY TABLE {table} (id uuid PRIMARY KEY, started_at timestamptz NOT NULL DEFAULT now())')
+
+        started = time.perf_counter()
+        for offset in range(0, ROWS, BATCH_SIZE):
+            with curs.copy(f'COPY {table} (id) FROM STDIN') as copy:
+                for _ in range(min(BATCH_SIZE, ROWS - offset)):
+                    copy.write_row((generate(),))
+            conn.commit()
+        elapsed = time.perf_counter() - started
+
+        curs.execute(f"SELECT pg_relation_size('{table}_pkey')")
+        index_size = curs.fetchone()[0]
+
+    print(f'{generate.__name__:>6}: {ROWS / elapsed:>10,.0f} rows/s, pkey index {index_size / 2**20:,.1f} MiB')
+
+
+with psycopg.connect(**config) as conn:
+    print(f'Inserting {ROWS:,} rows in batches of {BATCH_SIZE:,}.')
+    bench(conn, 'bench_uuid4', uuid.uuid4)
+    bench(conn, 'bench_uuid7', uuid7)
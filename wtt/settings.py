@@ -97,9 +97,28 @@ DATABASES = {
         'PASSWORD': os.environ['POSTGRES_PASSWORD'],
         'HOST': os.environ['POSTGRES_HOST'],
         'PORT': os.environ['POSTGRES_PORT'],
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Server-side binding lets psycopg prepare a query on the server once
+            # it has been run PREPARE_THRESHOLD times on the same connection.
+            # Disable it behind PgBouncer in transaction pooling mode.
+            'server_side_binding': cast_to_literal(os.environ.get('POSTGRES_SERVER_SIDE_BINDING', 'False')),
+            'prepare_threshold': cast_to_literal(os.environ.get('POSTGRES_PREPARE_THRESHOLD', '5')),
+        },
     }
 }
 
+# Connections are either taken from a psycopg pool, or kept open between
+# requests for CONN_MAX_AGE seconds. Django does not allow both at once.
+if cast_to_literal(os.environ.get('POSTGRES_POOL', 'False')):
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': cast_to_literal(os.environ.get('POSTGRES_POOL_MIN_SIZE', '2')),
+        'max_size': cast_to_literal(os.environ.get('POSTGRES_POOL_MAX_SIZE', '10')),
+        'timeout': cast_to_literal(os.environ.get('POSTGRES_POOL_TIMEOUT', '10')),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = cast_to_literal(os.environ.get('POSTGRES_CONN_MAX_AGE', '0'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -148,3 +167,35 @@ REST_FRAMEWORK = {
 
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
 }
+
+# Resolved authentication tokens are cached in each process, see
+# wtt/work_sessions/authentication.py. Set TOKEN_CACHE_BACKEND to an alias
+# from CACHES to cache them there instead, shared between processes.
+TOKEN_CACHE = {
+    'MAX_SIZE': cast_to_literal(os.environ.get('TOKEN_CACHE_MAX_SIZE', '10000')),
+    'TTL': cast_to_literal(os.environ.get('TOKEN_CACHE_TTL', '60')),
+    'BACKEND': os.environ.get('TOKEN_CACHE_BACKEND') or None,
+}
+
+# Local memory by default; set CACHE_BACKEND and CACHE_LOCATION to share the
+# cache between processes, e.g. django.core.cache.backends.redis.RedisCache.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+}
+
+# Label list and detail responses are cached per owner in this alias of
+# CACHES, see wtt/work_sessions/label_cache.py. Set LABEL_CACHE_BACKEND to an
+# empty string to disable the cache.
+LABEL_CACHE = {
+    'BACKEND': os.environ.get('LABEL_CACHE_BACKEND', 'default') or None,
+    'TTL': cast_to_literal(os.environ.get('LABEL_CACHE_TTL', '3600')),
+}
+
+# Tombstones of deleted sessions and labels are kept this many days for the
+# change feed, see the purge_tombstones command. Older cursors must resync.
+CHANGES = {
+    'TOMBSTONE_RETENTION_DAYS': cast_to_literal(os.environ.get('CHANGES_TOMBSTONE_RETENTION_DAYS', '30')),
+}
@@ -19,8 +19,12 @@ from django.urls import path, include
 
 from rest_framework.authtoken import views as authtoken_views
 
+from wtt.work_sessions.views import ChangesHorizonView, TokenCacheStatsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('login/', authtoken_views.obtain_auth_token),
     path('api/work_sessions/', include('wtt.work_sessions.urls')),
+    path('metrics/token_cache/', TokenCacheStatsView.as_view(), name='token-cache-stats'),
+    path('metrics/changes_horizon/', ChangesHorizonView.as_view(), name='changes-horizon'),
 ]
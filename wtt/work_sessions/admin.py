@@ -6,8 +6,8 @@ from .models import WorkSession, WorkSessionLabel
 from .forms import WorkSessionAdminForm
 
 def complete_sessions(modeladmin, request, queryset):
-    for ws in queryset:
-        ws.end()
+    ended = queryset.end()
+    modeladmin.message_user(request, f'{ended} work sessions have been completed.')
 
 
 class WorkSessionAdmin(admin.ModelAdmin):
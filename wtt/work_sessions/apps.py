@@ -5,3 +5,6 @@ class WorkSessionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wtt.work_sessions'
     verbose_name = 'Work sessions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,133 @@
+"""
+Async variants of the work session endpoints for ASGI servers. They read with
+the async ORM, so a request that waits for the database does not hold a
+thread. Writes, which need a transaction, run in one thread hop each.
+"""
+from asgiref.sync import sync_to_async
+
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.core.exceptions import ValidationError
+
+from rest_framework import exceptions
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST
+
+from .authentication import AsyncCachedTokenAuthentication
+from .models import WorkSession
+from .serializers import WorkSessionSerializer
+from .views import filter_work_sessions, end_work_session
+
+
+class AsyncAPIView(View):
+    """
+    A minimal async counterpart of DRF's APIView: token authentication, the
+    default parsers, JSON responses and DRF's error format.
+    """
+
+    authenticator = AsyncCachedTokenAuthentication()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        try:
+            credentials = await self.authenticator.aauthenticate(request)
+            if credentials is None:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = credentials
+
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404 as exc:
+            return self.handle_exception(exceptions.NotFound(*exc.args))
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def handle_exception(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response['WWW-Authenticate'] = self.authenticator.authenticate_header(None)
+        return response
+
+    def render(self, data, status=HTTP_200_OK):
+        return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+    def get_queryset(self, request):
+        queryset = WorkSession.objects.filter(owner=request.user).prefetch_related('labels')
+        return filter_work_sessions(queryset, request.query_params)
+
+    async def get_object(self, request, pk):
+        try:
+            return await self.get_queryset(request).aget(pk=pk)
+        except WorkSession.DoesNotExist:
+            raise Http404('No WorkSession matches the given query.')
+
+
+class AsyncWorkSessionListView(AsyncAPIView):
+
+    async def get(self, request):
+        paginator = LimitOffsetPagination()
+        paginator.request = request
+        paginator.limit = paginator.get_limit(request)
+        paginator.offset = paginator.get_offset(request)
+
+        queryset = self.get_queryset(request)
+        paginator.count = await queryset.acount()
+
+        sessions = []
+        if paginator.count > paginator.offset:
+            sessions = [ws async for ws in queryset[paginator.offset:paginator.offset + paginator.limit]]
+
+        return self.render({
+            'count': paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': WorkSessionSerializer(sessions, many=True).data,
+        })
+
+    async def post(self, request):
+        serializer = WorkSessionSerializer(data=request.data, context={'request': request})
+        return self.render(await create_work_session(serializer, request.user), status=HTTP_201_CREATED)
+
+
+class AsyncWorkSessionView(AsyncAPIView):
+
+    async def get(self, request, pk):
+        ws = await self.get_object(request, pk)
+        return self.render(WorkSessionSerializer(ws).data)
+
+
+class AsyncWorkSessionEndView(AsyncAPIView):
+
+    async def post(self, request, pk):
+        ws = await self.get_object(request, pk)
+
+        try:
+            data = await end_work_session_atomically(ws, request.data if request.body else {})
+        except ValidationError as exc:
+            return self.render({'detail': str(exc)}, status=HTTP_400_BAD_REQUEST)
+
+        return self.render(data)
+
+
+@sync_to_async
+@transaction.atomic
+def create_work_session(serializer, owner):
+    serializer.is_valid(raise_exception=True)
+    serializer.save(owner=owner)
+    return serializer.data
+
+
+@sync_to_async
+@transaction.atomic
+def end_work_session_atomically(ws, data):
+    return end_work_session(ws, data).data
@@ -0,0 +1,200 @@
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """
+    Resolved tokens kept for TTL seconds in a bounded in-process LRU, or in a
+    shared Django cache instead, so that all the processes skip the database
+    and see the same invalidations.
+
+    Entries are dropped when their token is deleted or their user is changed
+    (see signals.py), and once more when the transaction of the change
+    commits: a request that read the old row meanwhile may have cached it.
+    With the LRU, other processes keep a stale entry for at most TTL
+    seconds. Changes that send no signal, e.g.
+    User.objects.update(is_active=False), are only seen once the entries
+    expire, so keep the TTL short.
+    """
+
+    key_prefix = 'wtt:token:'
+
+    def __init__(self, max_size, ttl, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0}
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.TOKEN_CACHE
+        return cls(config['MAX_SIZE'], config['TTL'], backend=config['BACKEND'])
+
+    @property
+    def shared(self):
+        return caches[self.backend] if self.backend else None
+
+    def get(self, key):
+        """
+        Returns a tuple of the user and the token or None.
+        """
+        if self.shared:
+            return self._count_shared(self.shared.get(self.key_prefix + key))
+        return self._get_local(key)
+
+    async def aget(self, key):
+        if self.shared:
+            return self._count_shared(await self.shared.aget(self.key_prefix + key))
+        return self._get_local(key)
+
+    def set(self, key, value):
+        if self.shared:
+            self.shared.set(self.key_prefix + key, value, self.ttl)
+        else:
+            self._set_local(key, value)
+
+    async def aset(self, key, value):
+        if self.shared:
+            await self.shared.aset(self.key_prefix + key, value, self.ttl)
+        else:
+            self._set_local(key, value)
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+
+            if entry:
+                del self._entries[key]
+            self._stats['misses'] += 1
+
+        return None
+
+    def _count_shared(self, value):
+        with self._lock:
+            self._stats['misses' if value is None else 'shared_hits'] += 1
+        return value
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key):
+        self._invalidate(key)
+        transaction.on_commit(lambda: self._invalidate(key))
+
+    def invalidate_user(self, user_id):
+        self._invalidate_user(user_id)
+        transaction.on_commit(lambda: self._invalidate_user(user_id))
+
+    def _invalidate(self, key):
+        if self.shared:
+            self.shared.delete(self.key_prefix + key)
+        else:
+            with self._lock:
+                self._entries.pop(key, None)
+
+    def _invalidate_user(self, user_id):
+        if self.shared:
+            keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+            self.shared.delete_many([self.key_prefix + key for key in keys])
+        else:
+            with self._lock:
+                keys = [key for key, (_, (user, _)) in self._entries.items() if user.pk == user_id]
+                for key in keys:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'backend': self.backend,
+            }
+
+
+token_cache = TokenCache.from_settings()
+
+
+def copy_credentials(credentials):
+    # Changes of a request to its user, e.g. to last_login, must not leak
+    # into the cached one shared with other requests.
+    user, token = credentials
+    user = copy.copy(user)
+    token = copy.copy(token)
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(authentication.TokenAuthentication):
+    """
+    TokenAuthentication that resolves a token with the database only on a miss
+    of the token cache.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return copy_credentials(cached)
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, copy_credentials((user, token)))
+        return user, token
+
+
+class AsyncCachedTokenAuthentication(CachedTokenAuthentication):
+    """
+    CachedTokenAuthentication for the async views, which resolves a token with
+    the async ORM on a miss of the token cache.
+    """
+
+    async def aauthenticate(self, request):
+        # authenticate() parses the header and returns what
+        # authenticate_credentials() returns, a coroutine here.
+        credentials = self.authenticate(request)
+        return credentials and await credentials
+
+    async def authenticate_credentials(self, key):
+        cached = await token_cache.aget(key)
+        if cached is not None:
+            return copy_credentials(cached)
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        await token_cache.aset(key, copy_credentials((token.user, token)))
+        return token.user, token
@@ -0,0 +1,173 @@
+import json
+import base64
+import binascii
+import contextlib
+import contextvars
+import datetime as dt
+
+from django.conf import settings
+from django.db import connection
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .models import ClockTimestamp, WorkSession, WorkSessionLabel, WorkSessionTombstone
+
+# Changes are timestamped by the database after the start of their
+# transaction. A transaction that starts while get_horizon() reads the
+# activity may be missed by it, so the horizon is kept this much behind.
+CLOCK_MARGIN = dt.timedelta(seconds=1)
+
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 1000
+
+SOURCES = {
+    'sessions': (WorkSession, 'updated_at'),
+    'labels': (WorkSessionLabel, 'updated_at'),
+    'deleted': (WorkSessionTombstone, 'deleted_at'),
+}
+
+
+_collected_tombstones = contextvars.ContextVar('collected_tombstones', default=None)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorTooOld(InvalidCursor):
+    pass
+
+
+def get_tombstone_retention():
+    return dt.timedelta(days=settings.CHANGES['TOMBSTONE_RETENTION_DAYS'])
+
+
+def purge_tombstones():
+    """
+    Delete the tombstones kept longer than the retention and return how many
+    have been deleted.
+    """
+    deleted, _ = WorkSessionTombstone.objects.filter(deleted_at__lt=ClockTimestamp() - get_tombstone_retention()).delete()
+    return deleted
+
+
+def add_tombstone(tombstone):
+    collected = _collected_tombstones.get()
+    if collected is None:
+        tombstone.save()
+    else:
+        collected.append(tombstone)
+
+
+@contextlib.contextmanager
+def collect_tombstones():
+    """
+    Create the tombstones of the objects deleted in the block with one query
+    at its end, rather than one query per object.
+    """
+    collected = []
+    token = _collected_tombstones.set(collected)
+    try:
+        yield
+    finally:
+        _collected_tombstones.reset(token)
+
+    WorkSessionTombstone.objects.bulk_create(collected)
+
+
+def get_changes(owner, cursor=None, since=None, limit=CHANGES_PAGE_SIZE):
+    """
+    Returns the sessions and labels of the owner created or updated, and the
+    tombstones of those deleted, after the cursor of a previous page or else
+    after the since datetime, each ordered by time of change.
+
+    The cursor holds a position per source, so every page costs time
+    proportional to its changes. Only changes before get_horizon() are
+    returned, since their transactions have been committed: a change of an
+    open transaction never appears behind a cursor that has passed it.
+
+    Tombstones are kept for get_tombstone_retention(), so CursorTooOld is
+    raised for a position before that: the client must sync from scratch.
+    """
+    positions = decode_cursor(cursor) if cursor else {name: (since, None) if since else None for name in SOURCES}
+    horizon, now = get_horizon()
+
+    if positions['deleted'] and positions['deleted'][0] < now - get_tombstone_retention():
+        raise CursorTooOld('Deletions this old are no longer kept, sync again without a cursor or since.')
+
+    querysets = {
+        'sessions': WorkSession.objects.filter(owner=owner).prefetch_related('labels'),
+        'labels': WorkSessionLabel.objects.filter(owner=owner).with_session_stats(),
+        'deleted': WorkSessionTombstone.objects.filter(owner=owner),
+    }
+
+    changes = {}
+    has_more = False
+    for name, (_, field) in SOURCES.items():
+        queryset = querysets[name].filter(**{f'{field}__lt': horizon})
+        if positions[name]:
+            queryset = _after(queryset, field, *positions[name])
+
+        rows = list(queryset.order_by(field, 'pk')[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            positions[name] = (getattr(rows[-1], field), rows[-1].pk)
+            has_more = True
+        else:
+            # All the changes up to the horizon have been read.
+            positions[name] = (horizon, None)
+
+        changes[name] = rows
+
+    return changes, encode_cursor(positions), has_more
+
+
+def get_horizon():
+    """
+    Returns the time before which all the changes have been committed, and
+    the current time of the database.
+
+    The horizon is the start of the oldest transaction of another client
+    that may write, i.e. that has a transaction id or a snapshot, or else
+    the current time, minus CLOCK_MARGIN. A transaction left open holds it
+    back, see ChangesHorizonView for monitoring how far.
+    """
+    with connection.cursor() as cursor:
+        # The activity is otherwise read once per transaction.
+        cursor.execute('SELECT pg_stat_clear_snapshot()')
+        cursor.execute(
+            "SELECT clock_timestamp(), min(xact_start) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend' "
+            "AND (backend_xid IS NOT NULL OR backend_xmin IS NOT NULL)",
+        )
+        now, oldest_start = cursor.fetchone()
+        return min(now, oldest_start or now) - CLOCK_MARGIN, now
+
+
+def encode_cursor(positions):
+    data = {
+        name: position and [position[0].isoformat(), position[1] and str(position[1])]
+        for name, position in positions.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            name: data[name] and (
+                dt.datetime.fromisoformat(data[name][0]),
+                data[name][1] and model._meta.pk.to_python(data[name][1]),
+            )
+            for name, (model, _) in SOURCES.items()
+        }
+    except (TypeError, ValueError, KeyError, IndexError, binascii.Error, ValidationError):
+        raise InvalidCursor(f'"{cursor}" is not a valid cursor.')
+
+
+def _after(queryset, field, value, pk):
+    # Without a row, the position is a time before which everything has been read.
+    if pk is None:
+        return queryset.filter(**{f'{field}__gte': value})
+    return queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk}))
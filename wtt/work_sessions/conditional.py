@@ -0,0 +1,67 @@
+import hashlib
+
+from django.db import connection
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.status import HTTP_200_OK
+
+from .models import WorkSession, WorkSessionLabel
+
+
+def get_owner_state(owner_id):
+    """
+    Returns the latest updated_at and the number of rows of the sessions and
+    of the labels of the owner, read with one query.
+
+    A session shows the names of its labels and a label the number and the
+    duration of its sessions, so any response of either viewset changes
+    with this state:
+    a change bumps updated_at (signals.py bumps both sides of a change of
+    WorkSession.labels), a deletion changes the number of rows.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT * FROM '
+            f'(SELECT max(updated_at), count(*) FROM {WorkSession._meta.db_table} WHERE owner_id = %s) AS ws, '
+            f'(SELECT max(updated_at), count(*) FROM {WorkSessionLabel._meta.db_table} WHERE owner_id = %s) AS wsl',
+            [owner_id, owner_id],
+        )
+        return cursor.fetchone()
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests with 304 Not Modified, before anything is read or
+    serialized, if the ETag of the client still matches the state of the
+    owner.
+
+    Only ETags are compared. Last-Modified is sent for information, but
+    If-Modified-Since alone is not answered with 304, since deletions do not
+    change the latest updated_at.
+    """
+
+    def get_validators(self, request):
+        """
+        Returns the state the responses depend on and the time of its latest
+        change, if it is known.
+        """
+        state = get_owner_state(request.user.pk)
+        return state, max(filter(None, (state[0], state[2])), default=None)
+
+    def get_conditional_response(self, view, request, *args, **kwargs):
+        state, last_modified = self.get_validators(request)
+        # Kept for the view, e.g. as the key of a cached response.
+        self.owner_state = state
+        etag = quote_etag(hashlib.md5(repr((request.user.pk, state)).encode()).hexdigest())
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == HTTP_200_OK:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
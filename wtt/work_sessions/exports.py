@@ -0,0 +1,50 @@
+import csv
+import itertools
+
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+
+CSV_FIELDS = ['id', 'started_at', 'ended_at', 'duration', 'note', 'labels']
+CSV_LABEL_SEPARATOR = ';'
+
+
+class Echo:
+    """
+    A file-like object that returns what is written to it, so csv.writer
+    can produce rows one at a time for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(rows):
+    encoder = JSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+
+    for row in rows:
+        labels = CSV_LABEL_SEPARATOR.join(label['name'] for label in row['label_details'])
+        yield writer.writerow([row['id'], row['started_at'], row['ended_at'], row['duration'], row['note'], labels])
+
+
+async def stream_in_chunks(lines, chunk_size):
+    """
+    Yields the lines of a sync iterator joined in chunks of chunk_size, each
+    read in the thread of the sync view through sync_to_async, so an ASGI
+    server streams them rather than reading them all into a list first.
+    """
+    read_chunk = sync_to_async(lambda: ''.join(itertools.islice(lines, chunk_size)))
+    while chunk := await read_chunk():
+        yield chunk
+
+
+EXPORT_FORMATS = {
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+    'csv': (stream_csv, 'text/csv'),
+}
@@ -14,13 +14,14 @@ class WorkSessionAdminForm(forms.ModelForm):
         labels = cleaned_data.get('labels', [])
         owner = cleaned_data.get('owner')
 
-        if not owner:
-            ws = self.instance
-            owner = ws.owner
+        # The labels have been read with one query, so their owners are
+        # compared by id rather than read one by one.
+        owner_id = owner.pk if owner else self.instance.owner_id
 
         if labels:
             for label in labels:
-                if label.owner != owner:
+                if label.owner_id != owner_id:
+                    owner = owner or self.instance.owner
                     raise ValidationError(f'Label "{label}" does not belong to owner "{owner}".')
 
         return cleaned_data
@@ -0,0 +1,148 @@
+import datetime as dt
+import itertools
+
+from django.db import connection, transaction
+
+from .models import ClockTimestamp, WorkSession, WorkSessionLabel
+from .rollups import get_day, refresh_daily_totals
+from .uuids import uuid7
+
+IMPORT_BATCH_SIZE = 5000
+
+NOTE_MAX_LENGTH = WorkSession._meta.get_field('note').max_length
+LABEL_NAME_MAX_LENGTH = WorkSessionLabel._meta.get_field('name').max_length
+
+
+class ImportValidationError(Exception):
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} rows are not valid.')
+        self.errors = errors
+
+
+def import_work_sessions(owner, rows):
+    """
+    Create sessions of the owner from an iterable of dicts like:
+
+        {"started_at": "2025-03-03T10:00:00Z", "ended_at": "...", "note": "...", "labels": ["name", ...]}
+
+    Rows of the export format (with "label_details" instead of "labels") are
+    accepted too. Missing labels are created. Rows are validated and loaded
+    in batches with COPY, all in one transaction: if any row is not valid,
+    nothing is imported and ImportValidationError lists the errors per row.
+
+    Returns the number of imported sessions.
+    """
+    rows = iter(rows)
+    errors = []
+    imported = 0
+    days = set()
+
+    with transaction.atomic():
+        for offset in itertools.count(step=IMPORT_BATCH_SIZE):
+            batch = list(itertools.islice(rows, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+
+            sessions = []
+            for index, row in enumerate(batch, start=offset):
+                session, row_errors = validate_import_row(row)
+                if row_errors:
+                    errors.append({'index': index, 'errors': row_errors})
+                else:
+                    sessions.append(session)
+
+            # Keep validating to report all the errors, but do not load anything.
+            if errors:
+                continue
+
+            _load_sessions(owner, sessions)
+            imported += len(sessions)
+            days.update(get_day(session['started_at']) for session in sessions if session['ended_at'])
+
+        if errors:
+            raise ImportValidationError(errors)
+
+        refresh_daily_totals(owner.pk, days)
+
+    return imported
+
+
+def validate_import_row(row):
+    """
+    Returns a tuple of the cleaned session values and a dict of errors per field.
+    """
+    if not isinstance(row, dict):
+        return None, {'non_field_errors': ['Expected an object.']}
+
+    errors = {}
+    session = {}
+
+    started_at = row.get('started_at')
+    if started_at is None:
+        errors['started_at'] = ['This field is required.']
+    else:
+        session['started_at'] = _parse_datetime(started_at, 'started_at', errors)
+
+    ended_at = row.get('ended_at')
+    session['ended_at'] = None if ended_at is None else _parse_datetime(ended_at, 'ended_at', errors)
+
+    if session.get('started_at') and session['ended_at'] and session['ended_at'] < session['started_at']:
+        errors['ended_at'] = ['The session cannot end before it has started.']
+
+    note = row.get('note') or ''
+    if not isinstance(note, str):
+        errors['note'] = ['Not a valid string.']
+    elif len(note) > NOTE_MAX_LENGTH:
+        errors['note'] = [f'Ensure this field has no more than {NOTE_MAX_LENGTH} characters.']
+    session['note'] = note
+
+    if 'labels' in row:
+        labels = row['labels'] or []
+    else:
+        labels = [label.get('name') if isinstance(label, dict) else None for label in row.get('label_details') or []]
+
+    if not isinstance(labels, list) or not all(
+        isinstance(name, str) and 0 < len(name) <= LABEL_NAME_MAX_LENGTH for name in labels
+    ):
+        errors['labels'] = [f'Expected a list of label names of 1 to {LABEL_NAME_MAX_LENGTH} characters.']
+    session['labels'] = labels
+
+    return session, errors
+
+
+def _parse_datetime(value, field, errors):
+    try:
+        value = dt.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        errors[field] = ['Not a valid ISO 8601 formated datetime string.']
+        return None
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt.timezone.utc)
+    return value
+
+
+def _load_sessions(owner, sessions):
+    names = itertools.chain.from_iterable(session['labels'] for session in sessions)
+    labels, _ = WorkSessionLabel.objects.get_or_create_many(owner, names)
+    label_ids = {name: label.pk for name, label in labels.items()}
+
+    ws_table = WorkSession._meta.db_table
+    links_table = WorkSession.labels.through._meta.db_table
+
+    links = []
+    with connection.cursor() as cursor:
+        with cursor.copy(f'COPY {ws_table} (id, owner_id, started_at, ended_at, duration, note) FROM STDIN') as copy:
+            for session in sessions:
+                ws_id = uuid7()
+                started_at, ended_at = session['started_at'], session['ended_at']
+                duration = int((ended_at - started_at).total_seconds() // 60) if ended_at else None
+                copy.write_row((ws_id, owner.pk, started_at, ended_at, duration, session['note']))
+                links.extend((ws_id, label_ids[name]) for name in set(session['labels']))
+
+        if links:
+            WorkSessionLabel.objects.filter(pk__in={label_id for _, label_id in links}).update(updated_at=ClockTimestamp())
+            with cursor.copy(f'COPY {links_table} (worksession_id, worksessionlabel_id) FROM STDIN') as copy:
+                for link in links:
+                    copy.write_row(link)
@@ -0,0 +1,50 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LabelResponseCache:
+    """
+    Label list and detail responses cached per owner in a Django cache.
+
+    The keys include the state of the owner read for the ETag (see
+    get_owner_state() in conditional.py), which every change of the labels
+    or of their sessions changes. A response is therefore only served while
+    the data it was built from is unchanged, whichever process changed it,
+    so the cache needs no invalidation and may be local to each process.
+    Responses of older states expire after TTL seconds.
+
+    The cache is disabled without a backend.
+    """
+
+    key_prefix = 'wtt:labels:'
+
+    def __init__(self, ttl, backend):
+        self.ttl = ttl
+        self.backend = backend
+
+    @classmethod
+    def from_settings(cls):
+        config = settings.LABEL_CACHE
+        return cls(config['TTL'], config['BACKEND'])
+
+    @property
+    def enabled(self):
+        return bool(self.backend)
+
+    @property
+    def cache(self):
+        return caches[self.backend]
+
+    def get(self, owner_id, state, url):
+        return self.cache.get(self._make_key(owner_id, state, url))
+
+    def set(self, owner_id, state, url, data):
+        self.cache.set(self._make_key(owner_id, state, url), data, self.ttl)
+
+    def _make_key(self, owner_id, state, url):
+        return f'{self.key_prefix}{owner_id}:{hashlib.md5(repr((state, url)).encode()).hexdigest()}'
+
+
+label_cache = LabelResponseCache.from_settings()
@@ -0,0 +1,39 @@
+import argparse
+import datetime as dt
+
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import WorkSession
+
+
+class Command(BaseCommand):
+    help = 'End the running work sessions started before a time, of all users or of one.'
+
+    def add_arguments(self, parser):
+        started = parser.add_mutually_exclusive_group(required=True)
+        started.add_argument('--started-before', type=parse_datetime, help='ISO 8601 datetime, UTC if naive.')
+        started.add_argument('--older-than', type=int, metavar='HOURS', help='Hours since the start.')
+        parser.add_argument('--user', dest='username', help='Only end the sessions of this user.')
+
+    def handle(self, *args, started_before=None, older_than=None, username=None, **options):
+        if older_than is not None:
+            started_before = timezone.now() - dt.timedelta(hours=older_than)
+
+        sessions = WorkSession.objects.filter(started_at__lt=started_before)
+        if username:
+            try:
+                sessions = sessions.filter(owner=get_user_model().objects.get(username=username))
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'User "{username}" does not exist.')
+
+        ended = sessions.end()
+        self.stdout.write(f'Ended {ended} work sessions.')
+
+def parse_datetime(value):
+    try:
+        value = dt.datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'"{value}" is not a valid ISO 8601 formated datetime string.')
+    return value if value.tzinfo else value.replace(tzinfo=dt.timezone.utc)
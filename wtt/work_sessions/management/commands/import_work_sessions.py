@@ -0,0 +1,53 @@
+import sys
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ...imports import ImportValidationError, import_work_sessions
+
+
+class Command(BaseCommand):
+    help = 'Import work sessions of a user from an NDJSON file, e.g. one made by the export endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='Path to an NDJSON file, or "-" to read from stdin.')
+
+    def handle(self, *args, username, path, **options):
+        try:
+            owner = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'User "{username}" does not exist.')
+
+        if path == '-':
+            imported = self._import(owner, sys.stdin)
+        else:
+            try:
+                with open(path, encoding='utf-8') as file:
+                    imported = self._import(owner, file)
+            except OSError as exc:
+                raise CommandError(f'Cannot read "{path}": {exc.strerror}.')
+
+        self.stdout.write(f'Imported {imported} work sessions.')
+
+    def _import(self, owner, file):
+        try:
+            return import_work_sessions(owner, read_ndjson(file))
+        except ImportValidationError as exc:
+            for error in exc.errors:
+                self.stderr.write(f'Line {error["index"] + 1}: {json.dumps(error["errors"])}')
+            raise CommandError(f'Nothing has been imported: {exc}')
+
+
+def read_ndjson(file):
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # Reported as an invalid row by the importer.
+            yield None
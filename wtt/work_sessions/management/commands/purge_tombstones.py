@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...changes import get_tombstone_retention, purge_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the tombstones of work sessions and labels kept longer than CHANGES_TOMBSTONE_RETENTION_DAYS. '
+        'Change feed cursors older than that must sync again from scratch.'
+    )
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(f'Deleted {deleted} tombstones older than {get_tombstone_retention().days} days.')
@@ -0,0 +1,27 @@
+import argparse
+import datetime as dt
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...rollups import rebuild_daily_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily totals of work sessions from scratch or for a range of UTC days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=parse_date, help='First day to rebuild, YYYY-MM-DD.')
+        parser.add_argument('--to', dest='date_to', type=parse_date, help='Last day to rebuild, YYYY-MM-DD.')
+
+    def handle(self, *args, date_from=None, date_to=None, **options):
+        if date_from and date_to and date_from > date_to:
+            raise CommandError('--from must not be later than --to.')
+
+        created = rebuild_daily_totals(date_from, date_to)
+        self.stdout.write(f'Created {created} daily total rows.')
+
+def parse_date(value):
+    try:
+        return dt.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'"{value}" is not a valid ISO 8601 formated date string.')
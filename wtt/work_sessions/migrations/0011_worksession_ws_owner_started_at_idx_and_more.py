@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:33
+
+import django.db.models.deletion
+import wtt.work_sessions.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0010_alter_worksession_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['owner', '-started_at'], name='ws_owner_started_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['owner'], name='ws_owner_running_idx'),
+        ),
+        migrations.AlterField(
+            model_name='worksession',
+            name='owner',
+            field=models.ForeignKey(db_index=False, default=wtt.work_sessions.models.WorkSession.owner_default, on_delete=django.db.models.deletion.CASCADE, related_name='work_sessions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:34
+
+import wtt.work_sessions.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0011_worksession_ws_owner_started_at_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='worksession',
+            name='id',
+            field=models.UUIDField(default=wtt.work_sessions.uuids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='worksessionlabel',
+            name='id',
+            field=models.UUIDField(default=wtt.work_sessions.uuids.uuid7, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+POPULATE_TOTALS = '''
+INSERT INTO wtt_work_session_daily_total (owner_id, day, label_id, sessions, duration)
+SELECT ws.owner_id, (ws.started_at AT TIME ZONE 'UTC')::date, NULL, COUNT(*), COALESCE(SUM(ws.duration), 0)
+FROM wtt_work_session ws
+WHERE ws.ended_at IS NOT NULL
+GROUP BY 1, 2;
+
+INSERT INTO wtt_work_session_daily_total (owner_id, day, label_id, sessions, duration)
+SELECT ws.owner_id, (ws.started_at AT TIME ZONE 'UTC')::date, wsl.worksessionlabel_id, COUNT(*), COALESCE(SUM(ws.duration), 0)
+FROM wtt_work_session ws
+JOIN wtt_work_session_labels wsl ON wsl.worksession_id = ws.id
+WHERE ws.ended_at IS NOT NULL
+GROUP BY 1, 2, 3;
+'''
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0012_uuid7_primary_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkSessionDailyTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sessions', models.IntegerField(default=0)),
+                ('duration', models.IntegerField(default=0, verbose_name='Duration, mins')),
+                ('label', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_totals', to='work_sessions.worksessionlabel')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_session_daily_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'wtt_work_session_daily_total',
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'day', 'label'), name='unique_owner_day_label', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunSQL(POPULATE_TOTALS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:54
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0013_worksessiondailytotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+        migrations.AddField(
+            model_name='worksessionlabel',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+    ]
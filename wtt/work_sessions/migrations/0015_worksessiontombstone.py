@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0014_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkSessionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('session', 'Session'), ('label', 'Label')], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'wtt_work_session_tombstone',
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['owner', 'updated_at', 'id'], name='ws_owner_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksessionlabel',
+            index=models.Index(fields=['owner', 'updated_at', 'id'], name='wsl_owner_updated_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='worksessiontombstone',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='work_session_tombstones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='worksessiontombstone',
+            index=models.Index(fields=['owner', 'deleted_at', 'id'], name='tombstone_owner_deleted_at_idx'),
+        ),
+    ]
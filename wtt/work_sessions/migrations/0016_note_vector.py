@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0015_worksessiontombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksession',
+            name='note_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('note', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['note_vector'], name='note_vector_gin'),
+        ),
+    ]
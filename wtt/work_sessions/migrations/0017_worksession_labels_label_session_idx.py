@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:53
+
+from django.db import migrations
+
+# The through table of WorkSession.labels is created by Django, so it gets
+# an index covering both columns for lookups of sessions by label, which
+# answers the label filters of the list with index-only scans. It makes the
+# single-column index of the label foreign key redundant, but Django creates
+# and tracks that one with the table, so it is kept.
+CREATE_INDEX = 'CREATE INDEX wsl_label_session_idx ON wtt_work_session_labels (worksessionlabel_id, worksession_id)'
+
+DROP_INDEX = 'DROP INDEX wsl_label_session_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0016_note_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
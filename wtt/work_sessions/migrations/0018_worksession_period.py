@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:59
+
+import datetime as dt
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import wtt.work_sessions.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.db.models.functions import Now
+from django.contrib.postgres.operations import BtreeGistExtension
+
+
+def clamp_ended_at(apps, schema_editor):
+    """
+    A period cannot end before it starts, but a session ended by an app
+    server whose clock was behind may. Such sessions end when they start,
+    with a duration of 0, and their negative durations are taken out of
+    their daily totals.
+    """
+    WorkSession = apps.get_model('work_sessions', 'WorkSession')
+    WorkSessionDailyTotal = apps.get_model('work_sessions', 'WorkSessionDailyTotal')
+
+    sessions = WorkSession.objects.filter(ended_at__lt=F('started_at'))
+    for ws in sessions.prefetch_related('labels'):
+        WorkSessionDailyTotal.objects.filter(
+            Q(label=None) | Q(label__in=ws.labels.all()),
+            owner_id=ws.owner_id,
+            day=ws.started_at.astimezone(dt.timezone.utc).date(),
+        ).update(duration=F('duration') - (ws.duration or 0))
+
+    sessions.update(ended_at=F('started_at'), duration=0, updated_at=Now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0017_worksession_labels_label_session_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_ended_at, migrations.RunPython.noop),
+        # For the owner in ws_owner_period_gist.
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='worksession',
+            name='period',
+            field=models.GeneratedField(db_persist=True, expression=wtt.work_sessions.models.TsTzRange('started_at', 'ended_at'), output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['owner', 'period'], name='ws_owner_period_gist'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:56
+
+import wtt.work_sessions.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('work_sessions', '0018_worksession_period'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='worksession',
+            name='updated_at',
+            field=wtt.work_sessions.models.DatabaseClockDateTimeField(auto_now=True, db_default=wtt.work_sessions.models.ClockTimestamp()),
+        ),
+        migrations.AlterField(
+            model_name='worksessionlabel',
+            name='updated_at',
+            field=wtt.work_sessions.models.DatabaseClockDateTimeField(auto_now=True, db_default=wtt.work_sessions.models.ClockTimestamp()),
+        ),
+        migrations.AlterField(
+            model_name='worksessiontombstone',
+            name='deleted_at',
+            field=models.DateTimeField(db_default=wtt.work_sessions.models.ClockTimestamp()),
+        ),
+    ]
@@ -1,23 +1,230 @@
-import uuid
+import functools
 
-from django.db import models
+from django.db import IntegrityError, connection, connections, models, router, transaction
 from django.conf import settings
+from django.dispatch import Signal
 from django.utils import timezone
-from django.core.exceptions import ValidationError
+from django.core.exceptions import EmptyResultSet, ValidationError
 from django.contrib.auth import get_user_model
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Coalesce
+
+from .uuids import uuid7
 
 DT_FORMAT = '%d.%m.%Y %H:%M:%S'
 
+# Text search configuration of the notes, see search.py.
+NOTE_SEARCH_CONFIG = 'english'
+
+# Sent with the sessions ended by WorkSession.end() or
+# WorkSessionQuerySet.end(), which do not send post_save.
+work_sessions_ended = Signal()
+
+# The end of a session ended at %s: the clock of the app server that ends
+# it may be behind the one of the server that started it, and the period
+# cannot end before it starts.
+ENDED_AT_SQL = 'greatest(%s::timestamptz, started_at)'
+# Its duration, in whole minutes.
+DURATION_SQL = f'floor(extract(epoch FROM {ENDED_AT_SQL} - started_at) / 60)'
+
+
+@functools.cache
+def get_stub_user_id():
+    """
+    Returns the id of the user who owns the sessions created without an
+    owner. It is read once per process and forgotten whenever a user is
+    saved or deleted, see signals.py. Other processes keep it until one of
+    their inserts fails, see _insert_retrying_stub_user().
+    """
+    return get_user_model().objects.get(username='stub').id
+
+
+def _insert_retrying_stub_user(sessions, insert, using):
+    """
+    Call insert() for the sessions. If some are owned by the stub user, the
+    insert runs in a savepoint: another process may have replaced the stub
+    user since its id was read by this one, so the insert fails and is
+    retried with the id read again.
+    """
+    # The id has not been read since the last change of a user, so none of
+    # the sessions holds a stale one.
+    if not get_stub_user_id.cache_info().currsize:
+        return insert()
+
+    stub_user_id = get_stub_user_id()
+    if not any(ws.owner_id == stub_user_id for ws in sessions):
+        return insert()
+
+    try:
+        with transaction.atomic(using=using):
+            result = insert()
+            # Foreign keys are otherwise only checked on commit.
+            connections[using].check_constraints()
+        return result
+    except IntegrityError:
+        get_stub_user_id.cache_clear()
+        if get_stub_user_id() == stub_user_id:
+            raise
+
+    for ws in sessions:
+        if ws.owner_id == stub_user_id:
+            ws.owner_id = get_stub_user_id()
+    return insert()
+
+
+class TsTzRange(models.Func):
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class ClockTimestamp(models.Func):
+    """
+    The current time of the database. Unlike Now(), the start of the
+    transaction, it advances within a transaction.
+    """
+    template = 'clock_timestamp()'
+    output_field = models.DateTimeField()
+
+
+class DatabaseClockDateTimeField(models.DateTimeField):
+    """
+    A DateTimeField whose auto_now and auto_now_add take the time of the
+    database rather than of the app server, so the changes made by all the
+    app servers are ordered by one clock.
+
+    An insert returns the stored time when the field has a db_default. After
+    an update, the attribute holds the expression until the instance is
+    refreshed from the database.
+    """
+
+    def pre_save(self, model_instance, add):
+        if self.auto_now or (self.auto_now_add and add):
+            value = ClockTimestamp()
+            setattr(model_instance, self.attname, value)
+            return value
+        return super().pre_save(model_instance, add)
+
+
+class WorkSessionQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        return _insert_retrying_stub_user(objs, functools.partial(super().bulk_create, objs, *args, **kwargs), self.db)
+
+    def end(self):
+        """
+        End the running sessions of the queryset with a single UPDATE and
+        return how many have been ended. Sessions that have already ended are
+        left as they are.
+        """
+        now = timezone.now()
+        try:
+            sql, params = self.filter(ended_at__isnull=True).order_by().values('pk').query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        with transaction.atomic(using=self.db), connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.model._meta.db_table} '
+                f'SET ended_at = {ENDED_AT_SQL}, duration = {DURATION_SQL}, updated_at = clock_timestamp() '
+                f'WHERE id IN ({sql}) AND ended_at IS NULL '
+                f'RETURNING id, owner_id, started_at, ended_at',
+                [now, now, *params],
+            )
+            sessions = [
+                self.model(id=pk, owner_id=owner_id, started_at=started_at, ended_at=ended_at)
+                for pk, owner_id, started_at, ended_at in cursor.fetchall()
+            ]
+
+            if sessions:
+                work_sessions_ended.send(sender=self.model, sessions=sessions)
+
+        return len(sessions)
+
+    def delete(self):
+        # The labels show the number of their sessions. They are touched here
+        # with one UPDATE, rather than by a pre_delete receiver per session.
+        with transaction.atomic(using=self.db):
+            WorkSessionLabel.objects.using(self.db).filter(
+                work_sessions__in=self.order_by().values('pk'),
+            ).update(updated_at=ClockTimestamp())
+            return super().delete()
+
+
+class WorkSessionManager(models.Manager.from_queryset(WorkSessionQuerySet)):
+
+    def get_queryset(self):
+        # The search vector and the period are only read by the database.
+        return super().get_queryset().defer('note_vector', 'period')
+
+
+class WorkSessionLabelQuerySet(models.QuerySet):
+
+    def with_session_stats(self):
+        """
+        Annotate each label with the number of its sessions (session_count)
+        and the total duration of those ended, in minutes (total_duration),
+        computed in the same grouped query.
+        """
+        return self.annotate(
+            session_count=models.Count('work_sessions'),
+            total_duration=Coalesce(models.Sum('work_sessions__duration'), 0),
+        )
+
+    def get_or_create_many(self, owner, names):
+        """
+        Returns a dict of the labels of the owner by name, for the given
+        names, and the set of names of those created, with a single
+        INSERT ... ON CONFLICT statement on the unique_name_owner constraint:
+        concurrent calls never fail with IntegrityError.
+        """
+        names = set(names)
+        labels = {}
+        created = []
+        table = self.model._meta.db_table
+        fields = ['id', 'name', 'updated_at', 'owner_id']
+
+        # A label created by a transaction that was still running when the
+        # statement started is neither created nor read by it, so the
+        # statement is repeated for those.
+        while names:
+            with connections[self.db].cursor() as cursor:
+                cursor.execute(
+                    f'WITH input (id, name) AS (SELECT * FROM unnest(%s::uuid[], %s::text[])), '
+                    f'created AS ('
+                    f'INSERT INTO {table} (id, name, owner_id) SELECT id, name, %s FROM input '
+                    f'ON CONFLICT (name, owner_id) DO NOTHING '
+                    f'RETURNING id, name, updated_at) '
+                    f'SELECT id, name, updated_at, true FROM created '
+                    f'UNION ALL '
+                    f'SELECT id, name, updated_at, false FROM {table} '
+                    f'WHERE owner_id = %s AND name IN (SELECT name FROM input)',
+                    [[uuid7() for _ in names], list(names), owner.pk, owner.pk],
+                )
+                rows = cursor.fetchall()
+
+            for pk, name, updated_at, is_created in rows:
+                label = self.model.from_db(self.db, fields, [pk, name, updated_at, owner.pk])
+                labels[name] = label
+                if is_created:
+                    created.append(label)
+            names -= labels.keys()
+
+        return labels, {label.name for label in created}
+
 
 class WorkSession(models.Model):
 
     def owner_default():
-        return get_user_model().objects.get(username='stub').id
+        return get_stub_user_id()
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     started_at = models.DateTimeField(auto_now_add=True)
     ended_at = models.DateTimeField(blank=True, null=True)
+    # Rows written without save(), e.g. with COPY, get the same time.
+    updated_at = DatabaseClockDateTimeField(auto_now=True, db_default=ClockTimestamp())
     duration = models.IntegerField(
         verbose_name='Duration, mins',
         blank=True,
@@ -28,11 +235,24 @@ class WorkSession(models.Model):
         default='',
         max_length=1000,
     )
+    note_vector = models.GeneratedField(
+        expression=SearchVector('note', config=NOTE_SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # [started_at, ended_at), without an upper bound while the session runs.
+    period = models.GeneratedField(
+        expression=TsTzRange('started_at', 'ended_at'),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         related_name='work_sessions',
         on_delete=models.CASCADE,
         default=owner_default,
+        # Covered by the ws_owner_started_at_idx index.
+        db_index=False,
     )
     labels = models.ManyToManyField(
         'work_sessions.WorkSessionLabel',
@@ -40,13 +260,57 @@ class WorkSession(models.Model):
         blank=True,
     )
 
+    objects = WorkSessionManager()
+
+    # The daily totals and the totals shown by the labels change with these
+    # fields, see signals.py.
+    TOTALS_FIELDS = ['owner_id', 'started_at', 'ended_at', 'duration']
+
     class Meta:
         db_table = 'wtt_work_session'
         ordering = ['-started_at', '-ended_at']
         indexes = [
             GinIndex(name='note_trgm_gin', fields=['note'], opclasses=['gin_trgm_ops']),
+            GinIndex(name='note_vector_gin', fields=['note_vector']),
+            models.Index(name='ws_owner_started_at_idx', fields=['owner', '-started_at']),
+            models.Index(name='ws_owner_running_idx', fields=['owner'], condition=models.Q(ended_at__isnull=True)),
+            models.Index(name='ws_owner_updated_at_idx', fields=['owner', 'updated_at', 'id']),
+            GistIndex(name='ws_owner_period_gist', fields=['owner', 'period']),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_totals_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+            _insert_retrying_stub_user([self], functools.partial(super().save, *args, **kwargs), using)
+        else:
+            super().save(*args, **kwargs)
+        self.remember_totals_fields()
+
+    def remember_totals_fields(self):
+        """
+        Keep the values of TOTALS_FIELDS, to tell on save whether they have
+        changed. Deferred fields are left out.
+        """
+        self._totals_values = {name: self.__dict__[name] for name in self.TOTALS_FIELDS if name in self.__dict__}
+
+    def get_changed_totals_fields(self):
+        """
+        Returns a dict of the previous values of TOTALS_FIELDS changed since
+        the session was read or saved. Without previous values, e.g. for a
+        session built with the primary key of a stored one, any of them may
+        have changed: their current values are returned.
+        """
+        previous = self.__dict__.get('_totals_values')
+        if previous is None:
+            return {name: self.__dict__[name] for name in self.TOTALS_FIELDS if name in self.__dict__}
+        return {name: value for name, value in previous.items() if self.__dict__.get(name, value) != value}
+
     def __str__(self):
         name = self.started_at.strftime(DT_FORMAT)
         if self.ended_at:
@@ -56,24 +320,45 @@ class WorkSession(models.Model):
     def ended(self):
         return bool(self.ended_at)
 
-    def end(self):
-        if self.ended_at:
-            raise ValidationError(f'The session {self.pk} has been already ended.')
+    def end(self, note=None):
+        """
+        End the session, and replace its note if one is given, with a single
+        conditional UPDATE: of concurrent calls only one ends the session,
+        the others raise ValidationError. The duration is computed by the
+        database from the stored started_at.
+        """
+        now = timezone.now()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self._meta.db_table} '
+                f'SET ended_at = {ENDED_AT_SQL}, duration = {DURATION_SQL}, note = coalesce(%s, note), '
+                f'updated_at = clock_timestamp() '
+                f'WHERE id = %s AND ended_at IS NULL '
+                f'RETURNING started_at, ended_at, duration, note, updated_at',
+                [now, now, note, self.pk],
+            )
+            row = cursor.fetchone()
+
+            if row is None:
+                raise ValidationError(f'The session {self.pk} has been already ended.')
 
-        self.ended_at = timezone.now()
-        self.duration = (self.ended_at - self.started_at).total_seconds() // 60
-        self.save()
+            self.started_at, self.ended_at, self.duration, self.note, self.updated_at = row
+            self.remember_totals_fields()
+            work_sessions_ended.send(sender=type(self), sessions=[self])
 
 
 class WorkSessionLabel(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    id = models.UUIDField(primary_key=True, default=uuid7)
     name = models.CharField(max_length=100)
+    updated_at = DatabaseClockDateTimeField(auto_now=True, db_default=ClockTimestamp())
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         related_name='work_session_labels',
         on_delete=models.CASCADE,
     )
 
+    objects = WorkSessionLabelQuerySet.as_manager()
+
     class Meta:
         db_table = 'wtt_work_session_label'
         ordering = ['name']
@@ -82,7 +367,78 @@ class WorkSessionLabel(models.Model):
         ]
         indexes = [
             GinIndex(name='wsl_name_trgm_gin', fields=['name'], opclasses=['gin_trgm_ops']),
+            models.Index(name='wsl_owner_updated_at_idx', fields=['owner', 'updated_at', 'id']),
         ]
 
     def __str__(self):
         return f'{self.name} (by {self.owner})'
+
+
+class WorkSessionDailyTotal(models.Model):
+    """
+    Durations of ended sessions summed up per owner and UTC day of start.
+
+    The row without a label holds the totals of all sessions of the day,
+    the other rows hold the totals of sessions having that label.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='work_session_daily_totals',
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField()
+    label = models.ForeignKey(
+        WorkSessionLabel,
+        related_name='daily_totals',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    sessions = models.IntegerField(default=0)
+    duration = models.IntegerField(verbose_name='Duration, mins', default=0)
+
+    class Meta:
+        db_table = 'wtt_work_session_daily_total'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'day', 'label'],
+                name='unique_owner_day_label',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        label = self.label.name if self.label_id else 'total'
+        return f'{self.day} {label}: {self.duration} mins (by {self.owner})'
+
+
+class WorkSessionTombstone(models.Model):
+    """
+    A deleted session or label, kept for the change feed (see changes.py).
+    """
+
+    KIND_SESSION = 'session'
+    KIND_LABEL = 'label'
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='work_session_tombstones',
+        on_delete=models.CASCADE,
+        # Covered by the tombstone_owner_deleted_at_idx index.
+        db_index=False,
+    )
+    kind = models.CharField(max_length=10, choices=[(KIND_SESSION, 'Session'), (KIND_LABEL, 'Label')])
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(db_default=ClockTimestamp())
+
+    class Meta:
+        db_table = 'wtt_work_session_tombstone'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(name='tombstone_owner_deleted_at_idx', fields=['owner', 'deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} deleted at {self.deleted_at.strftime(DT_FORMAT)}'
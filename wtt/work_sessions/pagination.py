@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class WorkSessionCursorPagination(CursorPagination):
+    # Keep in sync with WorkSession.Meta.ordering. DRF only encodes the
+    # started_at of a page boundary in the cursor, plus an offset over the
+    # sessions sharing it. The other fields keep the order of those sessions
+    # stable, so the offset skips the same ones on every request.
+    ordering = ['-started_at', '-ended_at', 'id']
+    page_size_query_param = 'limit'
+    max_page_size = 1000
@@ -0,0 +1,155 @@
+import json
+import uuid
+import base64
+import datetime as dt
+
+from django.db import connection, models
+from django.db.models.functions import Trunc
+
+REPORT_PERIODS = ['day', 'week', 'month']
+REPORT_GROUPS = REPORT_PERIODS + ['label']
+
+OVERLAPS_PAGE_SIZE = 100
+OVERLAPS_MAX_PAGE_SIZE = 1000
+
+
+def build_report(queryset, group_by, tzinfo):
+    """
+    Sum up durations of the ended sessions in the queryset in a single grouped
+    query. Periods are truncated in the given timezone, weeks start on Monday
+    (ISO 8601). A session with several labels is counted for each of them.
+    """
+    assert group_by in REPORT_GROUPS, f'Unknown report group "{group_by}".'
+
+    queryset = queryset.filter(ended_at__isnull=False).prefetch_related(None).order_by()
+    totals = {
+        'total_sessions': models.Count('id'),
+        'total_duration': models.Sum('duration'),
+    }
+
+    if group_by == 'label':
+        rows = (
+            queryset
+            .filter(labels__isnull=False)
+            .values(label_id=models.F('labels__id'), label_name=models.F('labels__name'))
+            .annotate(**totals)
+            .order_by('label_name')
+        )
+        return [{
+            'label': {'id': row['label_id'], 'name': row['label_name']},
+            'sessions': row['total_sessions'],
+            'duration': row['total_duration'],
+        } for row in rows]
+
+    bucket = Trunc('started_at', group_by, output_field=models.DateField(), tzinfo=tzinfo)
+    rows = queryset.annotate(bucket=bucket).values('bucket').annotate(**totals).order_by('bucket')
+    return [{
+        'bucket': row['bucket'],
+        'sessions': row['total_sessions'],
+        'duration': row['total_duration'],
+    } for row in rows]
+
+
+def build_daily_totals_report(queryset, group_by):
+    """
+    Same as build_report, but from a queryset of daily totals, which are kept
+    per UTC day. It reads one row per day (and label) instead of every session.
+    """
+    assert group_by in REPORT_GROUPS, f'Unknown report group "{group_by}".'
+
+    totals = {
+        'total_sessions': models.Sum('sessions'),
+        'total_duration': models.Sum('duration'),
+    }
+
+    if group_by == 'label':
+        rows = (
+            queryset
+            .filter(label__isnull=False)
+            .values('label_id', label_name=models.F('label__name'))
+            .annotate(**totals)
+            .order_by('label_name')
+        )
+        return [{
+            'label': {'id': row['label_id'], 'name': row['label_name']},
+            'sessions': row['total_sessions'],
+            'duration': row['total_duration'],
+        } for row in rows]
+
+    bucket = Trunc('day', group_by, output_field=models.DateField())
+    rows = (
+        queryset
+        .filter(label__isnull=True)
+        .annotate(bucket=bucket)
+        .values('bucket')
+        .annotate(**totals)
+        .order_by('bucket')
+    )
+    return [{
+        'bucket': row['bucket'],
+        'sessions': row['total_sessions'],
+        'duration': row['total_duration'],
+    } for row in rows]
+
+
+def build_overlaps_report(queryset, limit=OVERLAPS_PAGE_SIZE, after=None):
+    """
+    Find the pairs of sessions in the queryset whose periods overlap, latest
+    first, with the time they overlap. Running sessions overlap everything
+    that starts after them, so their overlaps may have no end.
+
+    Returns at most limit pairs, after the position of a previous page if
+    given, and the position of the last pair if there are more. The queryset
+    is joined with itself on the periods, and each session is matched by the
+    ws_owner_period_gist index, so the query stops after limit pairs.
+    """
+    queryset = queryset.prefetch_related(None).order_by().values('id', 'started_at', 'period')
+    sql, params = queryset.query.sql_with_params()
+
+    # The pairs are in the order of (s.started_at, s.id, o.started_at, o.id),
+    # so the next page is after the last pair as a whole.
+    where = 'WHERE (s.started_at, s.id, o.started_at, o.id) < (%s, %s, %s, %s) ' if after else ''
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT s.id, o.id, lower(s.period * o.period), upper(s.period * o.period), s.started_at, o.started_at '
+            f'FROM ({sql}) AS s JOIN ({sql}) AS o '
+            f'ON o.period && s.period AND (o.started_at, o.id) < (s.started_at, s.id) '
+            f'{where}'
+            f'ORDER BY s.started_at DESC, s.id DESC, o.started_at DESC, o.id DESC '
+            f'LIMIT %s',
+            [*params, *params, *(after or []), limit + 1],
+        )
+        rows = cursor.fetchall()
+
+    last = None
+    if len(rows) > limit:
+        session_id, other_id, _, _, session_started_at, other_started_at = rows[limit - 1]
+        last = (session_started_at, session_id, other_started_at, other_id)
+
+    return [{
+        'session': session_id,
+        'other_session': other_id,
+        'start': start,
+        'end': end,
+        'duration': end and int((end - start).total_seconds() // 60),
+    } for session_id, other_id, start, end, _, _ in rows[:limit]], last
+
+
+def encode_overlaps_cursor(position):
+    session_started_at, session_id, other_started_at, other_id = position
+    data = [session_started_at.isoformat(), str(session_id), other_started_at.isoformat(), str(other_id)]
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_overlaps_cursor(cursor):
+    """
+    Returns the position encoded in the cursor, see encode_overlaps_cursor().
+    """
+    session_started_at, session_id, other_started_at, other_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return (
+        dt.datetime.fromisoformat(session_started_at),
+        uuid.UUID(session_id),
+        dt.datetime.fromisoformat(other_started_at),
+        uuid.UUID(other_id),
+    )
@@ -0,0 +1,128 @@
+import datetime as dt
+import itertools
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum, F
+from django.db.models.functions import Coalesce, TruncDate
+
+from .models import WorkSession, WorkSessionDailyTotal
+
+ROLLUP_TZ = dt.timezone.utc
+BATCH_SIZE = 1000
+
+
+def get_day(started_at):
+    return started_at.astimezone(ROLLUP_TZ).date()
+
+
+def get_day_start(day):
+    return dt.datetime.combine(day, dt.time(), tzinfo=ROLLUP_TZ)
+
+
+def refresh_daily_totals(owner_id, days):
+    """
+    Recompute the daily totals of the owner for the given days from the sessions.
+
+    The days are recomputed from scratch rather than by applying deltas. The
+    refreshes of an owner are serialized by an advisory lock held until the
+    end of the transaction, so concurrent ones don't insert the same rows.
+    """
+    days = set(days)
+    if not days:
+        return
+
+    sessions = WorkSession.objects.filter(
+        owner_id=owner_id,
+        started_at__gte=get_day_start(min(days)),
+        started_at__lt=get_day_start(max(days) + dt.timedelta(days=1)),
+    )
+
+    with transaction.atomic():
+        _lock_owner_daily_totals(owner_id)
+        WorkSessionDailyTotal.objects.filter(owner_id=owner_id, day__in=days).delete()
+        _create_daily_totals(sessions, days)
+
+
+def refresh_daily_totals_of_sessions(sessions):
+    """
+    Recompute the daily totals touched by the given sessions (a queryset or a list of them).
+    """
+    days_by_owner = {}
+    for ws in sessions:
+        if ws.ended_at:
+            days_by_owner.setdefault(ws.owner_id, set()).add(get_day(ws.started_at))
+
+    # Owners are locked in the same order by everyone to avoid deadlocks.
+    for owner_id in sorted(days_by_owner):
+        refresh_daily_totals(owner_id, days_by_owner[owner_id])
+
+
+def rebuild_daily_totals(date_from=None, date_to=None):
+    """
+    Recompute the daily totals of all owners, optionally only for days in the
+    given range (both ends included). Returns the number of created rows.
+    """
+    totals = WorkSessionDailyTotal.objects.all()
+    sessions = WorkSession.objects.all()
+
+    if date_from:
+        totals = totals.filter(day__gte=date_from)
+        sessions = sessions.filter(started_at__gte=get_day_start(date_from))
+
+    if date_to:
+        totals = totals.filter(day__lte=date_to)
+        sessions = sessions.filter(started_at__lt=get_day_start(date_to + dt.timedelta(days=1)))
+
+    with transaction.atomic():
+        # Waits for the running refreshes and blocks new ones, which would
+        # otherwise insert rows that are being rebuilt.
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {WorkSessionDailyTotal._meta.db_table} IN EXCLUSIVE MODE')
+        totals.delete()
+        return _create_daily_totals(sessions)
+
+
+def _lock_owner_daily_totals(owner_id):
+    # The oid of the table namespaces the lock from other advisory locks.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(%s::regclass::oid::integer, %s)',
+            [WorkSessionDailyTotal._meta.db_table, owner_id],
+        )
+
+
+def _create_daily_totals(sessions, days=None):
+    sessions = (
+        sessions
+        .filter(ended_at__isnull=False)
+        .annotate(day=TruncDate('started_at', tzinfo=ROLLUP_TZ))
+        .order_by()
+    )
+    if days is not None:
+        sessions = sessions.filter(day__in=days)
+
+    aggregates = {
+        'total_sessions': Count('id'),
+        'total_duration': Coalesce(Sum('duration'), 0),
+    }
+    rows = itertools.chain(
+        sessions.values('owner_id', 'day').annotate(**aggregates).iterator(),
+        sessions.filter(labels__isnull=False).values('owner_id', 'day', label_id=F('labels')).annotate(**aggregates).iterator(),
+    )
+    objs = (
+        WorkSessionDailyTotal(
+            owner_id=row['owner_id'],
+            day=row['day'],
+            label_id=row.get('label_id'),
+            sessions=row['total_sessions'],
+            duration=row['total_duration'],
+        )
+        for row in rows
+    )
+
+    created = 0
+    while batch := list(itertools.islice(objs, BATCH_SIZE)):
+        WorkSessionDailyTotal.objects.bulk_create(batch)
+        created += len(batch)
+
+    return created
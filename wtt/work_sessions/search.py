@@ -0,0 +1,62 @@
+from django.db.models import F, Q, Value
+from django.db.models.functions import Replace
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, TrigramWordSimilarity
+
+from .models import NOTE_SEARCH_CONFIG, WorkSession
+
+SEARCH_MODES = ['trigram', 'fts', 'hybrid']
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+
+def search_work_sessions(queryset, search, mode='trigram', highlight=False):
+    """
+    Filter the sessions by their notes in one of the modes:
+
+    - trigram: fuzzy match of the search with words of the note, in the
+      default order (note_trgm_gin);
+    - fts: full-text match of the stemmed words of a web search query,
+      ordered by rank (note_vector_gin);
+    - hybrid: either of both, ordered by the sum of the rank and the trigram
+      similarity.
+
+    With highlight, note_highlight is an HTML-escaped snippet of the note with
+    the full-text matches wrapped in <mark> tags.
+    """
+    assert mode in SEARCH_MODES, f'Unknown search mode "{mode}".'
+
+    query = SearchQuery(search, config=NOTE_SEARCH_CONFIG, search_type='websearch')
+    rank = SearchRank(F('note_vector'), query)
+
+    if mode == 'trigram':
+        queryset = queryset.filter(note__trigram_word_similar=search)
+    elif mode == 'fts':
+        queryset = queryset.filter(note_vector=query).annotate(search_rank=rank)
+    else:
+        queryset = (
+            queryset
+            .filter(Q(note_vector=query) | Q(note__trigram_word_similar=search))
+            .annotate(search_rank=rank + TrigramWordSimilarity(search, 'note'))
+        )
+
+    if mode != 'trigram':
+        queryset = queryset.order_by('-search_rank', *WorkSession._meta.ordering)
+
+    if highlight:
+        queryset = queryset.annotate(note_highlight=SearchHeadline(
+            _escape_html('note'),
+            query,
+            config=NOTE_SEARCH_CONFIG,
+            start_sel=HIGHLIGHT_START,
+            stop_sel=HIGHLIGHT_STOP,
+        ))
+
+    return queryset
+
+
+def _escape_html(field):
+    expression = F(field)
+    for char, entity in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;')):
+        expression = Replace(expression, Value(char), Value(entity))
+    return expression
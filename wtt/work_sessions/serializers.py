@@ -1,6 +1,53 @@
-from rest_framework import serializers
+from django.db import models
+from django.db.models.functions import Cast
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.relations import MANY_RELATION_KWARGS
 
-from .models import WorkSession, WorkSessionLabel
+from .models import WorkSession, WorkSessionLabel, WorkSessionTombstone
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        return self.child_relation.to_internal_values(data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that, with many=True, reads all the related
+    objects with one query rather than one query per primary key.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        list_kwargs.update((key, value) for key, value in kwargs.items() if key in MANY_RELATION_KWARGS)
+        return BulkManyRelatedField(**list_kwargs)
+
+    def to_internal_values(self, data):
+        queryset = self.get_queryset()
+        pk = queryset.model._meta.pk
+
+        pks = []
+        for value in data:
+            if self.pk_field is not None:
+                value = self.pk_field.to_internal_value(value)
+            if isinstance(value, bool):
+                self.fail('incorrect_type', data_type=type(value).__name__)
+            pks.append((value, pk.to_python(value)))
+
+        objects = queryset.in_bulk([key for _, key in pks])
+        for value, key in pks:
+            if key not in objects:
+                self.fail('does_not_exist', pk_value=value)
+
+        return [objects[key] for _, key in pks]
 
 
 class WorkSessionLabelDetailsSerializer(serializers.ModelSerializer):
@@ -11,7 +58,7 @@ class WorkSessionLabelDetailsSerializer(serializers.ModelSerializer):
 
 
 class WorkSessionSerializer(serializers.ModelSerializer):
-    labels = serializers.PrimaryKeyRelatedField(
+    labels = BulkPrimaryKeyRelatedField(
         queryset=WorkSessionLabel.objects.all(),
         many=True,
         write_only=True,
@@ -38,25 +85,137 @@ class WorkSessionSerializer(serializers.ModelSerializer):
             field_labels = self.fields['labels'].child_relation
             field_labels.queryset = field_labels.queryset.filter(owner=user)
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+
+        # Annotated by a search with highlight, see search.py.
+        if hasattr(instance, 'note_highlight'):
+            data['highlight'] = instance.note_highlight
+
+        return data
+
     def validate(self, attrs):
-        if 'note' in attrs and not (self.instance and self.instance.ended()):
+        # The end action sets the note in the same query that ends the session.
+        ending = self.context.get('ending')
+        if 'note' in attrs and not (ending or (self.instance and self.instance.ended())):
             raise serializers.ValidationError('You cannot change the note if the session has not ended yet.')
 
         return super().validate(attrs)
 
 
+# The values read by serialize_work_session_rows().
+WORK_SESSION_VALUES = ['id', 'started_at', 'ended_at', 'duration', 'note']
+
+
+def serialize_work_session_rows(rows):
+    """
+    Returns the same data as WorkSessionSerializer(many=True).data for rows of
+    WorkSession.objects.values(*WORK_SESSION_VALUES), plus note_highlight if
+    annotated by a search, without creating model instances. The labels of
+    all the sessions are read with one query.
+    """
+    rows = list(rows)
+    datetime = _get_datetime_formatter()
+
+    label_details = {str(row['id']): [] for row in rows}
+    if label_details:
+        # The ids are read as text, as they are written to the response.
+        labels = WorkSessionLabel.objects.filter(work_sessions__in=list(label_details)).values_list(
+            Cast('work_sessions', models.TextField()), Cast('id', models.TextField()), 'name',
+        )
+        for ws_id, label_id, name in labels:
+            label_details[ws_id].append({'id': label_id, 'name': name})
+
+    data = []
+    for row in rows:
+        ws_id = str(row['id'])
+        item = {
+            'id': ws_id,
+            'started_at': datetime(row['started_at']),
+            'ended_at': row['ended_at'] and datetime(row['ended_at']),
+            'duration': row['duration'],
+            'note': row['note'],
+            'label_details': label_details[ws_id],
+        }
+        if 'note_highlight' in row:
+            item['highlight'] = row['note_highlight']
+        data.append(item)
+
+    return data
+
+
+def _get_datetime_formatter():
+    field = serializers.DateTimeField()
+    tz = field.default_timezone()
+    if api_settings.DATETIME_FORMAT != ISO_8601 or tz is None:
+        return field.to_representation
+
+    # DateTimeField.to_representation() reads the current time zone for
+    # every value, which takes most of its time.
+    def to_representation(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    return to_representation
+
+
+class WorkSessionBatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=['create', 'patch', 'end', 'delete'])
+    id = serializers.UUIDField(required=False)
+    data = serializers.DictField(required=False, default=dict)
+
+    def validate(self, attrs):
+        if attrs['op'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError({'id': f'This field is required for the "{attrs["op"]}" operation.'})
+
+        return super().validate(attrs)
+
+
+class WorkSessionBatchSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=WorkSessionBatchOperationSerializer(),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+
 class WorkSessionLabelSerializer(serializers.ModelSerializer):
+    # Annotated by WorkSessionLabel.objects.with_session_stats(). The
+    # sessions themselves are listed by labels/<id>/sessions/.
+    session_count = serializers.IntegerField(read_only=True)
+    total_duration = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = WorkSessionLabel
-        fields = ['id', 'name', 'work_sessions']
-        read_only_fields = ['id', 'work_sessions']
+        fields = ['id', 'name', 'session_count', 'total_duration']
+        read_only_fields = ['id']
 
     def create(self, validated_data):
+        """
+        Create the label, or with the get_or_create context return the
+        existing label of the same name; created tells which.
+        """
         name = validated_data.get('name')
         owner = validated_data.get('owner')
         assert name, f'Name is a required field, but its value is "{name}".'
         assert owner, f'Owner is a required field, but its value is "{owner}".'
-        if WorkSessionLabel.objects.filter(name=name, owner=owner).exists():
+
+        labels, created = WorkSessionLabel.objects.get_or_create_many(owner, [name])
+        self.created = bool(created)
+        if self.created:
+            label = labels[name]
+            label.session_count = label.total_duration = 0
+            return label
+
+        if not self.context.get('get_or_create'):
             raise serializers.ValidationError(f'You already have a label with the name "{name}".')
+        return WorkSessionLabel.objects.with_session_stats().get(pk=labels[name].pk)
+
 
-        return super().create(validated_data)
+class WorkSessionTombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(source='object_id', read_only=True)
+
+    class Meta:
+        model = WorkSessionTombstone
+        fields = ['kind', 'id', 'deleted_at']
+        read_only_fields = ['kind', 'deleted_at']
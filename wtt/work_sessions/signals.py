@@ -0,0 +1,131 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from .models import (
+    ClockTimestamp, WorkSession, WorkSessionLabel, WorkSessionQuerySet, WorkSessionTombstone, get_stub_user_id,
+    work_sessions_ended,
+)
+from .changes import add_tombstone
+from .rollups import get_day, refresh_daily_totals, refresh_daily_totals_of_sessions
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=WorkSession)
+def update_daily_totals(sender, instance, **kwargs):
+    # Running sessions are not counted in the daily totals.
+    if instance.ended_at:
+        refresh_daily_totals(instance.owner_id, [get_day(instance.started_at)])
+
+
+@receiver(post_save, sender=WorkSession)
+def update_daily_totals_on_save(sender, instance, created, **kwargs):
+    # Other changes, e.g. of the note, leave the daily totals as they are.
+    changed = instance.get_changed_totals_fields()
+    if not (created or changed):
+        return
+
+    update_daily_totals(sender, instance)
+
+    # The session may have been moved from another owner or day.
+    owner_id = changed.get('owner_id', instance.owner_id)
+    day = get_day(changed.get('started_at', instance.started_at))
+    if (owner_id, day) != (instance.owner_id, get_day(instance.started_at)):
+        refresh_daily_totals(owner_id, [day])
+
+
+@receiver(work_sessions_ended, sender=WorkSession)
+def update_daily_totals_on_end(sender, sessions, **kwargs):
+    refresh_daily_totals_of_sessions(sessions)
+
+
+@receiver(work_sessions_ended, sender=WorkSession)
+def touch_labels_on_end(sender, sessions, **kwargs):
+    # The labels show the total duration of their sessions.
+    WorkSessionLabel.objects.filter(work_sessions__in=[ws.pk for ws in sessions]).update(updated_at=ClockTimestamp())
+
+
+@receiver(post_save, sender=WorkSession)
+def touch_labels_on_save(sender, instance, created, **kwargs):
+    # The labels show the number and the total duration of their sessions.
+    changed = instance.get_changed_totals_fields()
+    if not created and changed.keys() & {'owner_id', 'ended_at', 'duration'}:
+        WorkSessionLabel.objects.filter(work_sessions=instance).update(updated_at=ClockTimestamp())
+
+
+@receiver(pre_delete, sender=WorkSession)
+def touch_labels_on_delete(sender, instance, origin, **kwargs):
+    # The labels of a deleted user are deleted with it, and those of the
+    # sessions of a queryset are touched by WorkSessionQuerySet.delete().
+    if getattr(origin, 'model', type(origin)) is get_user_model() or isinstance(origin, WorkSessionQuerySet):
+        return
+
+    # The links to the labels are deleted with the session, so they are
+    # touched before.
+    WorkSessionLabel.objects.filter(work_sessions=instance).update(updated_at=ClockTimestamp())
+
+
+@receiver(m2m_changed, sender=WorkSession.labels.through)
+def remember_cleared_relations(sender, instance, action, reverse, **kwargs):
+    # pk_set is None on clear, so the related objects are read before.
+    if action == 'pre_clear':
+        related = instance.work_sessions if reverse else instance.labels
+        instance._cleared_pks = set(related.values_list('pk', flat=True))
+
+
+def get_changed_pks(instance, action, pk_set):
+    return instance.__dict__.get('_cleared_pks', set()) if action == 'post_clear' else pk_set
+
+
+@receiver(m2m_changed, sender=WorkSession.labels.through)
+def update_daily_totals_on_labels_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        update_daily_totals(sender, instance)
+    else:
+        # The labels have been changed through a label, e.g. label.work_sessions.clear().
+        sessions = WorkSession.objects.filter(pk__in=get_changed_pks(instance, action, pk_set))
+        refresh_daily_totals_of_sessions(sessions.only('owner', 'started_at', 'ended_at'))
+
+
+@receiver(m2m_changed, sender=WorkSession.labels.through)
+def touch_on_labels_change(sender, instance, action, model, pk_set, **kwargs):
+    # A session shows its labels and a label its sessions, so both sides
+    # have changed.
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        type(instance).objects.filter(pk=instance.pk).update(updated_at=ClockTimestamp())
+        model.objects.filter(pk__in=get_changed_pks(instance, action, pk_set)).update(updated_at=ClockTimestamp())
+
+
+@receiver(post_delete, sender=WorkSession)
+@receiver(post_delete, sender=WorkSessionLabel)
+def create_tombstone(sender, instance, origin, **kwargs):
+    # The tombstones of a deleted user are deleted with it.
+    if getattr(origin, 'model', type(origin)) is get_user_model():
+        return
+
+    kind = WorkSessionTombstone.KIND_SESSION if sender is WorkSession else WorkSessionTombstone.KIND_LABEL
+    add_tombstone(WorkSessionTombstone(owner_id=instance.owner_id, kind=kind, object_id=instance.pk))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_cached_user_tokens(sender, instance, created, update_fields, **kwargs):
+    # The cached user may have been deactivated or otherwise changed. Logins
+    # only update last_login, which doesn't matter to the authentication.
+    if not created and update_fields != {'last_login'}:
+        token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_stub_user(sender, **kwargs):
+    # The stub user may have been renamed, deleted or replaced.
+    get_stub_user_id.cache_clear()
@@ -1,20 +1,31 @@
+import io
+import csv
 import json
+import uuid
+import threading
 import datetime as dt
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 
+from django.db import connection
 from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework.mixins import ListModelMixin
 from rest_framework.authtoken.models import Token
 from rest_framework.status import (
     HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT,
-    HTTP_400_BAD_REQUEST,
+    HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND,
 )
 
 from freezegun import freeze_time
 
-from ..models import WorkSession, WorkSessionLabel
+from ..authentication import token_cache
+from ..models import WorkSession, WorkSessionLabel, WorkSessionDailyTotal
 from ..serializers import WorkSessionSerializer, WorkSessionLabelSerializer
+from ..views import WorkSessionViewSet
 from .factories import TestFactories
 
 
@@ -64,6 +75,66 @@ class TestWorkSession(TestAPI):
         resp_data = json.loads(response.content)
         self.assertEqual(WorkSessionSerializer([ws2, ws1], many=True).data, resp_data['results'])
 
+    def test_get_list_loads_labels_in_bulk(self):
+        labels = [self._create_work_session_label(name=f'label {i}') for i in range(3)]
+        for _ in range(10):
+            ws = self._create_work_session()
+            ws.labels.set(labels)
+
+        url = reverse('work-session-list')
+        # Token, ETag state, count, sessions and one query for all their labels.
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertEqual(len(resp_data['results']), 10)
+        for item in resp_data['results']:
+            self.assertEqual(len(item['label_details']), 3)
+
+    def test_get_loads_labels_in_bulk(self):
+        ws = self._create_work_session()
+        ws.labels.set([self._create_work_session_label(name=f'label {i}') for i in range(3)])
+
+        url = reverse('work-session', args=[ws.id])
+        # Token, ETag state, session and its labels.
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def test_get_list_with_cursor_pagination(self):
+        now = dt.datetime.now(dt.timezone.utc)
+
+        sessions = []
+        for hours in [3, 2, 2, 2, 1]:
+            with freeze_time(now - dt.timedelta(hours=hours)):
+                sessions.append(self._create_work_session())
+        expected = WorkSession.objects.filter(pk__in=[ws.pk for ws in sessions]).order_by('-started_at', '-ended_at', 'id')
+
+        url = reverse('work-session-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'limit': 2})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertNotIn('count', resp_data)
+        self.assertIsNone(resp_data['previous'])
+
+        results = resp_data['results']
+        while resp_data['next']:
+            response = self.client.get(resp_data['next'])
+            self.assertEqual(response.status_code, HTTP_200_OK)
+
+            resp_data = json.loads(response.content)
+            self.assertLessEqual(len(resp_data['results']), 2)
+            results += resp_data['results']
+
+        self.assertEqual(WorkSessionSerializer(expected, many=True).data, results)
+
+    def test_get_list_with_invalid_cursor(self):
+        url = reverse('work-session-list')
+        response = self.client.get(url, {'pagination': 'cursor', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+
     def test_get_only_owned_records(self):
         my_ws = self._create_work_session()
 
@@ -115,6 +186,57 @@ class TestWorkSession(TestAPI):
         resp_data = json.loads(response.content)
         self.assertEqual(WorkSessionSerializer([ws], many=True).data, resp_data['results'])
 
+    def test_get_list_filtered_by_labels(self):
+        deep, client, admin = [self._create_work_session_label(name=name) for name in ['deep', 'client', 'admin']]
+
+        ws_deep = self._create_work_session()
+        ws_deep.labels.set([deep])
+        ws_both = self._create_work_session()
+        ws_both.labels.set([deep, client, admin])
+        ws_client = self._create_work_session()
+        ws_client.labels.set([client])
+        self._create_work_session()
+
+        url = reverse('work-session-list')
+        for params, expected in [
+            ({'labels': deep.pk}, [ws_both, ws_deep]),
+            ({'labels': f'{deep.pk},{client.pk}'}, [ws_client, ws_both, ws_deep]),
+            ({'labels': [deep.pk, client.pk]}, [ws_client, ws_both, ws_deep]),
+            ({'labels_all': f'{deep.pk},{client.pk}'}, [ws_both]),
+            ({'labels_all': f'{deep.pk},{deep.pk}'}, [ws_both, ws_deep]),
+            ({'labels': admin.pk, 'labels_all': client.pk}, [ws_both]),
+            ({'labels': uuid.uuid4()}, []),
+            ({'labels': ''}, [ws for ws in WorkSession.objects.all()]),
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, HTTP_200_OK)
+
+                resp_data = json.loads(response.content)
+                self.assertEqual([item['id'] for item in resp_data['results']], [str(ws.pk) for ws in expected])
+
+    def test_get_list_filtered_by_many_labels_in_one_query(self):
+        labels = [self._create_work_session_label(name=f'label {i}') for i in range(100)]
+        for i in range(10):
+            ws = self._create_work_session()
+            ws.labels.set(labels[i::10])
+
+        url = reverse('work-session-list')
+        for param, selected, count in [('labels', labels[:50], 10), ('labels_all', labels[::10], 1)]:
+            token_cache.clear()
+            # The same queries as without the filter: token, ETag state,
+            # count, sessions and their labels.
+            with self.subTest(param=param), self.assertNumQueries(5):
+                response = self.client.get(url, {param: ','.join(str(label.pk) for label in selected)})
+            self.assertEqual(response.status_code, HTTP_200_OK)
+            self.assertEqual(json.loads(response.content)['count'], count)
+
+    def test_get_list_filtered_by_invalid_labels(self):
+        url = reverse('work-session-list')
+        for param in ['labels', 'labels_all']:
+            response = self.client.get(url, {param: 'deep'})
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
     def test_get(self):
         ws = self._create_work_session()
 
@@ -180,18 +302,698 @@ class TestWorkSession(TestAPI):
         self.assertTrue(ws.ended())
         self.assertEqual(ws.note, new_note)
 
+    def test_end_with_note_in_one_update(self):
+        ws = self._create_work_session()
+
+        url = reverse('work-session-end', args=[ws.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data={'note': 'done'})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE wtt_work_session ')]
+        self.assertEqual(len(updates), 1)
+
+        resp_data = json.loads(response.content)
+        ws.refresh_from_db()
+        self.assertEqual(WorkSessionSerializer(ws).data, resp_data)
+        self.assertEqual(resp_data['note'], 'done')
+
+    def test_end_already_ended(self):
+        ws = self._create_work_session()
+        ws.end()
+
+        url = reverse('work-session-end', args=[ws.id])
+        response = self.client.post(url, data={'note': 'again'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+        ws.refresh_from_db()
+        self.assertEqual(ws.note, '')
+
+
+class TestWorkSessionListRows(TestAPI):
+
+    def test_same_response_as_list_model_mixin(self):
+        labels = [self._create_work_session_label(name=name) for name in ['meetings', 'code']]
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        for hours in range(5):
+            with freeze_time(started_at + dt.timedelta(hours=hours)):
+                ws = self._create_work_session(note=f'planning meeting {hours}')
+                ws.labels.set(labels[:hours % 3])
+            if hours % 2:
+                with freeze_time(started_at + dt.timedelta(hours=hours, minutes=30)):
+                    ws.end()
+
+        url = reverse('work-session-list')
+        for params in [
+            {},
+            {'limit': 2, 'offset': 1},
+            {'pagination': 'cursor', 'limit': 2},
+            {'search': 'meeting', 'search_mode': 'fts', 'highlight': 'true'},
+            {'labels': labels[0].pk},
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+
+            with mock.patch.object(WorkSessionViewSet, 'list_rows', ListModelMixin.list):
+                expected = self.client.get(url, params)
+            self.assertEqual(response.content, expected.content, params)
+
+
+class TestWorkSessionEndAll(TestAPI):
+
+    def test_end_all(self):
+        label = self._create_work_session_label()
+        running = [self._create_work_session() for _ in range(3)]
+        running[0].labels.set([label])
+        ended = self._create_work_session()
+        ended.end()
+
+        stub_user = get_user_model().objects.get(username='stub')
+        other = self._create_work_session(owner=stub_user)
+
+        url = reverse('work-session-end-all')
+        # Only the sessions selected by the filters are ended.
+        response = self.client.post(f'{url}?labels={label.pk}')
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {'ended': 1})
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), {'ended': 2})
+
+        self.assertFalse(WorkSession.objects.filter(owner=self._user, ended_at__isnull=True).exists())
+        other.refresh_from_db()
+        self.assertFalse(other.ended())
+
+
+class TestWorkSessionEndConcurrency(APITransactionTestCase, TestFactories):
+    # The stub user is created by a migration.
+    serialized_rollback = True
+
+    threads = 20
+
+    def test_only_one_of_concurrent_ends_succeeds(self):
+        user = self._create_user()
+        token = Token.objects.create(user=user)
+        ws = self._create_work_session(owner=user)
+
+        url = reverse('work-session-end', args=[ws.id])
+        barrier = threading.Barrier(self.threads)
+
+        def end(index):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+            try:
+                barrier.wait()
+                response = client.post(url, data={'note': f'note {index}'})
+                return response.status_code, json.loads(response.content)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            results = list(executor.map(end, range(self.threads)))
+
+        statuses = sorted(status for status, _ in results)
+        self.assertEqual(statuses, [HTTP_200_OK] + [HTTP_400_BAD_REQUEST] * (self.threads - 1))
+
+        [resp_data] = [data for status, data in results if status == HTTP_200_OK]
+        ws.refresh_from_db()
+        self.assertEqual(ws.note, resp_data['note'])
+        self.assertEqual(WorkSessionSerializer(ws).data, resp_data)
+
+        totals = WorkSessionDailyTotal.objects.get(owner=user, label=None)
+        self.assertEqual((totals.sessions, totals.duration), (1, ws.duration))
+
+
+class TestWorkSessionLabelCreateConcurrency(APITransactionTestCase, TestFactories):
+    # The stub user is created by a migration.
+    serialized_rollback = True
+
+    threads = 20
+
+    def _create_concurrently(self, url):
+        user = self._create_user()
+        token = Token.objects.create(user=user)
+        barrier = threading.Barrier(self.threads)
+
+        def create(index):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+            try:
+                barrier.wait()
+                response = client.post(url, data={'name': 'same'})
+                return response.status_code, json.loads(response.content)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            results = list(executor.map(create, range(self.threads)))
+
+        self.assertEqual(WorkSessionLabel.objects.filter(owner=user).count(), 1)
+        return results
+
+    def test_only_one_of_concurrent_creates_succeeds(self):
+        results = self._create_concurrently(reverse('work-session-label-list'))
+        statuses = sorted(status for status, _ in results)
+        self.assertEqual(statuses, [HTTP_201_CREATED] + [HTTP_400_BAD_REQUEST] * (self.threads - 1))
+
+    def test_concurrent_get_or_create(self):
+        results = self._create_concurrently(reverse('work-session-label-list') + '?get_or_create=true')
+        statuses = sorted(status for status, _ in results)
+        self.assertEqual(statuses, [HTTP_200_OK] * (self.threads - 1) + [HTTP_201_CREATED])
+        self.assertEqual(len({data['id'] for _, data in results}), 1)
+
+
+class TestWorkSessionReports(TestAPI):
+
+    def setUp(self):
+        super().setUp()
+
+        deep = self._create_work_session_label(name='deep')
+        client = self._create_work_session_label(name='client')
+
+        self._create_ended_work_session(dt.datetime(2025, 3, 3, 10), 30, labels=[deep])
+        # Still Monday in UTC, but already Tuesday in Kyiv.
+        self._create_ended_work_session(dt.datetime(2025, 3, 3, 23, 30), 60, labels=[deep, client])
+        self._create_ended_work_session(dt.datetime(2025, 3, 10, 9), 45)
+
+        with freeze_time(dt.datetime(2025, 3, 10, 12)):
+            self._create_work_session()
+
+        stub_user = get_user_model().objects.get(username='stub')
+        self._create_ended_work_session(dt.datetime(2025, 3, 3, 12), 15, owner=stub_user)
+
+    def _create_ended_work_session(self, started_at, minutes, labels=(), **kwargs):
+        started_at = started_at.replace(tzinfo=dt.timezone.utc)
+
+        with freeze_time(started_at):
+            ws = self._create_work_session(**kwargs)
+        with freeze_time(started_at + dt.timedelta(minutes=minutes)):
+            ws.end()
+
+        ws.labels.set(labels)
+        return ws
+
+    def _get_report(self, **params):
+        url = reverse('work-session-reports')
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_group_by_day(self):
+        url = reverse('work-session-reports')
+        # Token and the report itself.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'group_by': 'day'})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertEqual(resp_data['results'], [
+            {'bucket': '2025-03-03', 'sessions': 2, 'duration': 90},
+            {'bucket': '2025-03-10', 'sessions': 1, 'duration': 45},
+        ])
+
+    def test_group_by_day_in_timezone(self):
+        resp_data = self._get_report(group_by='day', tz='Europe/Kyiv')
+        self.assertEqual(resp_data['tz'], 'Europe/Kyiv')
+        self.assertEqual(resp_data['results'], [
+            {'bucket': '2025-03-03', 'sessions': 1, 'duration': 30},
+            {'bucket': '2025-03-04', 'sessions': 1, 'duration': 60},
+            {'bucket': '2025-03-10', 'sessions': 1, 'duration': 45},
+        ])
+
+    def test_group_by_week(self):
+        resp_data = self._get_report(group_by='week')
+        self.assertEqual(resp_data['results'], [
+            {'bucket': '2025-03-03', 'sessions': 2, 'duration': 90},
+            {'bucket': '2025-03-10', 'sessions': 1, 'duration': 45},
+        ])
+
+    def test_group_by_month(self):
+        resp_data = self._get_report(group_by='month')
+        self.assertEqual(resp_data['results'], [
+            {'bucket': '2025-03-01', 'sessions': 3, 'duration': 135},
+        ])
+
+    def test_group_by_label(self):
+        resp_data = self._get_report(group_by='label')
+        results = [(row['label']['name'], row['sessions'], row['duration']) for row in resp_data['results']]
+        self.assertEqual(results, [('client', 1, 60), ('deep', 2, 90)])
+
+    def test_respects_date_filters(self):
+        resp_data = self._get_report(group_by='day', started_at='2025-03-05T00:00:00')
+        self.assertEqual(resp_data['results'], [
+            {'bucket': '2025-03-10', 'sessions': 1, 'duration': 45},
+        ])
+
+    def test_daily_totals_match_sessions(self):
+        for group_by in ['day', 'week', 'month', 'label']:
+            from_daily_totals = self._get_report(group_by=group_by)
+            # The ended_at filter cannot be answered from the daily totals.
+            from_sessions = self._get_report(group_by=group_by, ended_at='2100-01-01T00:00:00')
+            self.assertEqual(from_daily_totals, from_sessions)
+
+    def test_invalid_params(self):
+        url = reverse('work-session-reports')
+
+        response = self.client.get(url, {'group_by': 'year'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url, {'tz': 'Mars/Olympus_Mons'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class TestWorkSessionExport(TestAPI):
+
+    def setUp(self):
+        super().setUp()
+
+        labels = [self._create_work_session_label(name=f'label {i}') for i in range(2)]
+        for _ in range(10):
+            ws = self._create_work_session()
+            ws.end()
+            ws.labels.set(labels)
+
+        ws = self._create_work_session()
+        ws.end()
+        ws.note = 'Gumby rides on the path of Middlesbrough'
+        ws.save()
+
+    def _export(self, **params):
+        url = reverse('work-session-export')
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        response, content = self._export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        expected = WorkSessionSerializer(WorkSession.objects.filter(owner=self._user), many=True).data
+        self.assertEqual(rows, expected)
+
+    def test_csv(self):
+        response, content = self._export(output='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[0]['note'], 'Gumby rides on the path of Middlesbrough')
+        self.assertEqual(rows[0]['labels'], '')
+        self.assertEqual(rows[1]['labels'], 'label 0;label 1')
+
+    def test_reuses_filters(self):
+        _, content = self._export(search='Middlesbruh')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['note'] for row in rows], ['Gumby rides on the path of Middlesbrough'])
+
+    def test_fetches_labels_in_chunks(self):
+        url = reverse('work-session-export')
+        with mock.patch.object(WorkSessionViewSet, 'export_chunk_size', 4):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+                content = b''.join(response.streaming_content)
+
+        self.assertEqual(len(content.splitlines()), 11)
+        # Token, sessions and labels for each of 3 chunks.
+        self.assertEqual(len(queries), 5)
+
+    async def test_streams_under_asgi(self):
+        token = await Token.objects.aget(user=self._user)
+        headers = {'Authorization': 'Token ' + token.key}
+        with mock.patch.object(WorkSessionViewSet, 'export_chunk_size', 4):
+            response = await self.async_client.get(reverse('work-session-export'), headers=headers)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [4, 4, 3])
+
+    def test_invalid_output(self):
+        url = reverse('work-session-export')
+        response = self.client.get(url, {'output': 'xlsx'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class TestWorkSessionPeriods(TestAPI):
+
+    def setUp(self):
+        super().setUp()
+
+        self._day = dt.datetime(2025, 3, 3, tzinfo=dt.timezone.utc)
+        self._first = self._create_ended_work_session(10, 11)
+        self._second = self._create_ended_work_session(10.5, 12)
+        self._third = self._create_ended_work_session(13, 14)
+        self._running = self._create_ended_work_session(13.5, None)
+        self._last = self._create_ended_work_session(15, 15.25)
+
+        stub_user = get_user_model().objects.get(username='stub')
+        self._create_ended_work_session(10, 11, owner=stub_user)
+
+    def _at(self, hours):
+        return self._day + dt.timedelta(hours=hours)
+
+    def _create_ended_work_session(self, start, end, **kwargs):
+        with freeze_time(self._at(start)):
+            ws = self._create_work_session(**kwargs)
+        if end is not None:
+            with freeze_time(self._at(end)):
+                ws.end()
+        return ws
+
+    def _get_ids(self, **params):
+        url = reverse('work-session-list')
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return [item['id'] for item in json.loads(response.content)['results']]
+
+    def _format(self, hours):
+        return self._at(hours).replace(tzinfo=None).isoformat()
+
+    def test_active_at(self):
+        for hours, expected in [
+            (10.75, [self._second, self._first]),
+            (11, [self._second]),
+            (12.5, []),
+            (100, [self._running]),
+        ]:
+            with self.subTest(hours=hours):
+                self.assertEqual(self._get_ids(active_at=self._format(hours)), [str(ws.pk) for ws in expected])
+
+    def test_overlaps(self):
+        for bounds, expected in [
+            ((11.5, 13.25), [self._third, self._second]),
+            ((None, 10.25), [self._first]),
+            ((14.5, None), [self._last, self._running]),
+            ((12, 13), []),
+        ]:
+            with self.subTest(bounds=bounds):
+                value = ','.join(self._format(hours) if hours is not None else '' for hours in bounds)
+                self.assertEqual(self._get_ids(overlaps=value), [str(ws.pk) for ws in expected])
+
+    def test_invalid_filters(self):
+        url = reverse('work-session-list')
+        for params in [{'active_at': 'noon'}, {'overlaps': self._format(10)}, {'overlaps': 'noon,'}]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    def test_overlaps_report(self):
+        url = reverse('work-session-overlaps')
+        # Token and the report itself.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertFalse(resp_data['has_more'])
+        self.assertEqual([
+            (row['session'], row['other_session'], row['start'], row['end'], row['duration'])
+            for row in resp_data['results']
+        ], [
+            (str(self._last.pk), str(self._running.pk), '2025-03-03T15:00:00Z', '2025-03-03T15:15:00Z', 15),
+            (str(self._running.pk), str(self._third.pk), '2025-03-03T13:30:00Z', '2025-03-03T14:00:00Z', 30),
+            (str(self._second.pk), str(self._first.pk), '2025-03-03T10:30:00Z', '2025-03-03T11:00:00Z', 30),
+        ])
+
+    def test_overlaps_report_of_running_sessions(self):
+        other = self._create_ended_work_session(16, None)
+
+        url = reverse('work-session-overlaps')
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertTrue(resp_data['has_more'])
+        self.assertEqual(resp_data['results'], [{
+            'session': str(other.pk),
+            'other_session': str(self._running.pk),
+            'start': '2025-03-03T16:00:00Z',
+            'end': None,
+            'duration': None,
+        }])
+
+    def test_overlaps_report_pages(self):
+        self._create_ended_work_session(16, None)
+        url = reverse('work-session-overlaps')
+        expected = json.loads(self.client.get(url).content)['results']
+
+        results = []
+        resp_data = {'cursor': None, 'has_more': True}
+        while resp_data['has_more']:
+            params = {'limit': 2, 'cursor': resp_data['cursor']} if resp_data['cursor'] else {'limit': 2}
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+            resp_data = json.loads(response.content)
+            results.extend(resp_data['results'])
+
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(results, expected)
+        self.assertIsNone(resp_data['cursor'])
+
+        response = self.client.get(url, {'cursor': 'nope'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    def test_overlaps_report_reuses_filters(self):
+        url = reverse('work-session-overlaps')
+        response = self.client.get(url, {'ended_at': self._format(12)})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertEqual([row['session'] for row in resp_data['results']], [str(self._second.pk)])
+
+        response = self.client.get(url, {'limit': 0})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class TestWorkSessionBatch(TestAPI):
+
+    def _post_batch(self, operations, status=HTTP_200_OK):
+        url = reverse('work-session-batch')
+        response = self.client.post(url, data={'operations': operations})
+        self.assertEqual(response.status_code, status)
+        return json.loads(response.content)
+
+    def test_batch(self):
+        label = self._create_work_session_label()
+        to_end = self._create_work_session()
+        to_patch = self._create_work_session()
+        to_patch.end()
+        to_delete = self._create_work_session()
+
+        resp_data = self._post_batch([
+            {'op': 'create', 'data': {'labels': [str(label.id)]}},
+            {'op': 'create'},
+            {'op': 'end', 'id': str(to_end.id), 'data': {'note': 'done'}},
+            {'op': 'patch', 'id': str(to_patch.id), 'data': {'note': 'patched', 'labels': [str(label.id)]}},
+            {'op': 'delete', 'id': str(to_delete.id)},
+        ])
+        results = resp_data['results']
+        self.assertEqual([result['status'] for result in results], [201, 201, 200, 200, 204])
+
+        created = WorkSession.objects.get(pk=results[0]['data']['id'])
+        self.assertEqual(created.owner, self._user)
+        self.assertEqual(list(created.labels.all()), [label])
+        self.assertEqual(results[0]['data'], WorkSessionSerializer(created).data)
+        self.assertEqual(results[1]['data']['label_details'], [])
+
+        to_end.refresh_from_db()
+        self.assertTrue(to_end.ended())
+        self.assertEqual(to_end.note, 'done')
+        self.assertEqual(results[2]['data'], WorkSessionSerializer(to_end).data)
+
+        to_patch.refresh_from_db()
+        self.assertEqual(to_patch.note, 'patched')
+        self.assertEqual(list(to_patch.labels.all()), [label])
+
+        self.assertNotIn('data', results[4])
+        self.assertFalse(WorkSession.objects.filter(pk=to_delete.pk).exists())
+
+    def test_batch_is_atomic(self):
+        ws = self._create_work_session()
+        to_delete = self._create_work_session()
+
+        stub_user = get_user_model().objects.get(username='stub')
+        not_mine = self._create_work_session(owner=stub_user)
+
+        resp_data = self._post_batch([
+            {'op': 'create'},
+            {'op': 'end', 'id': str(ws.id)},
+            {'op': 'delete', 'id': str(to_delete.id)},
+            {'op': 'end', 'id': str(ws.id)},
+            {'op': 'delete', 'id': str(not_mine.id)},
+        ], status=HTTP_400_BAD_REQUEST)
+        self.assertEqual([result['status'] for result in resp_data['results']], [424, 424, 424, 400, 404])
+        self.assertEqual(resp_data['results'][0]['errors'], {'detail': 'Not applied.'})
+
+        self.assertEqual(WorkSession.objects.filter(owner=self._user).count(), 2)
+        ws.refresh_from_db()
+        self.assertFalse(ws.ended())
+        self.assertTrue(WorkSession.objects.filter(pk=not_mine.pk).exists())
+
+    def test_batch_ends_sessions_together(self):
+        sessions = [self._create_work_session() for _ in range(3)]
+        ended = self._create_work_session()
+        ended.end()
+
+        with CaptureQueriesContext(connection) as queries:
+            resp_data = self._post_batch([{'op': 'end', 'id': str(ws.id)} for ws in sessions])
+        self.assertEqual([result['status'] for result in resp_data['results']], [200, 200, 200])
+        self.assertTrue(all(result['data']['ended_at'] for result in resp_data['results']))
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE wtt_work_session ')]
+        self.assertEqual(len(updates), 1)
+
+        resp_data = self._post_batch([
+            {'op': 'end', 'id': str(ended.id)},
+            {'op': 'patch', 'id': str(sessions[0].id), 'data': {'note': 'patched'}},
+        ], status=HTTP_400_BAD_REQUEST)
+        self.assertEqual([result['status'] for result in resp_data['results']], [400, 424])
+        self.assertIn('already ended', resp_data['results'][0]['errors']['detail'])
+
+    def test_batch_patches_session_ended_in_batch(self):
+        ws = self._create_work_session()
+
+        resp_data = self._post_batch([
+            {'op': 'end', 'id': str(ws.id)},
+            {'op': 'patch', 'id': str(ws.id), 'data': {'note': 'patched'}},
+        ])
+        self.assertEqual([result['status'] for result in resp_data['results']], [200, 200])
+
+        ws.refresh_from_db()
+        self.assertTrue(ws.ended())
+        self.assertEqual(ws.note, 'patched')
+
+    def test_batch_ignores_list_filters(self):
+        label = self._create_work_session_label()
+        ws = self._create_work_session()
+
+        url = reverse('work-session-batch')
+        response = self.client.post(f'{url}?labels={label.id}', data={'operations': [
+            {'op': 'create'},
+            {'op': 'end', 'id': str(ws.id)},
+        ]})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        results = json.loads(response.content)['results']
+        self.assertEqual([result['status'] for result in results], [201, 200])
+        self.assertEqual(results[1]['data']['id'], str(ws.id))
+        self.assertIsNotNone(results[1]['data']['ended_at'])
+        self.assertIn('data', results[0])
+
+    def test_batch_validates_operations(self):
+        resp_data = self._post_batch([{'op': 'end'}, {'op': 'rename', 'id': str(uuid.uuid4())}], status=HTTP_400_BAD_REQUEST)
+        self.assertIn('id', resp_data['operations']['0'])
+        self.assertIn('op', resp_data['operations']['1'])
+
+    def test_batch_number_of_queries_does_not_depend_on_operations(self):
+        def count_queries(size):
+            sessions = [self._create_work_session() for _ in range(size)]
+            to_end = [self._create_work_session() for _ in range(size)]
+            operations = [{'op': 'create'} for _ in range(size)]
+            operations += [{'op': 'delete', 'id': str(ws.id)} for ws in sessions]
+            operations += [{'op': 'end', 'id': str(ws.id)} for ws in to_end]
+
+            with CaptureQueriesContext(connection) as queries:
+                self._post_batch(operations)
+            return len(queries)
+
+        # The first request also resolves the token.
+        count_queries(1)
+        self.assertEqual(count_queries(2), count_queries(20))
+
+
+class TestWorkSessionImport(TestAPI):
+
+    def test_import(self):
+        existing_label = self._create_work_session_label(name='deep')
+
+        url = reverse('work-session-import')
+        response = self.client.post(url, data=[
+            {'started_at': '2025-03-03T10:00:00Z', 'ended_at': '2025-03-03T10:45:30Z', 'note': 'first', 'labels': ['deep', 'client']},
+            {'started_at': '2025-03-04T10:00:00', 'labels': []},
+        ])
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content), {'imported': 2})
+
+        first, second = WorkSession.objects.filter(owner=self._user).order_by('started_at')
+        self.assertEqual(first.started_at, dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc))
+        self.assertEqual(first.duration, 45)
+        self.assertEqual(first.note, 'first')
+        self.assertEqual(sorted(label.name for label in first.labels.all()), ['client', 'deep'])
+        self.assertIn(existing_label, first.labels.all())
+        self.assertIsNone(second.ended_at)
+        self.assertEqual(second.labels.count(), 0)
+
+        self.assertEqual(WorkSessionLabel.objects.filter(owner=self._user).count(), 2)
+
+    def test_import_reports_errors_per_row(self):
+        url = reverse('work-session-import')
+        response = self.client.post(url, data=[
+            {'started_at': '2025-03-03T10:00:00Z'},
+            {'ended_at': '2025-03-03T10:00:00Z'},
+            {'started_at': '2025-03-03T10:00:00Z', 'ended_at': '2025-03-03T09:00:00Z'},
+            {'started_at': 'yesterday', 'labels': ['']},
+        ])
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+        errors = json.loads(response.content)['errors']
+        self.assertEqual([error['index'] for error in errors], [1, 2, 3])
+        self.assertEqual(list(errors[0]['errors']), ['started_at'])
+        self.assertEqual(list(errors[1]['errors']), ['ended_at'])
+        self.assertEqual(sorted(errors[2]['errors']), ['labels', 'started_at'])
+
+        self.assertFalse(WorkSession.objects.filter(owner=self._user).exists())
+
+    def test_import_exported_sessions(self):
+        ws = self._create_work_session()
+        ws.end()
+        ws.labels.add(self._create_work_session_label())
+
+        response = self.client.get(reverse('work-session-export'))
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        response = self.client.post(reverse('work-session-import'), data=rows)
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+
+        imported = WorkSession.objects.filter(owner=self._user).exclude(pk=ws.pk).get()
+        self.assertEqual(
+            {k: v for k, v in WorkSessionSerializer(imported).data.items() if k != 'id'},
+            {k: v for k, v in WorkSessionSerializer(ws).data.items() if k != 'id'},
+        )
+
 
 class TestWorkSessionLabel(TestAPI):
 
+    def _serialize(self, *labels):
+        stats = WorkSessionLabel.objects.with_session_stats().in_bulk([wsl.pk for wsl in labels])
+        return WorkSessionLabelSerializer([stats[wsl.pk] for wsl in labels], many=True).data
+
     def test_create(self):
         url = reverse('work-session-label-list')
         response = self.client.post(url, data={'name': 'test create'})
         self.assertEqual(response.status_code, HTTP_201_CREATED)
 
         resp_data = json.loads(response.content)
-        wsl = WorkSessionLabel.objects.get(pk=resp_data['id'])
+        wsl = WorkSessionLabel.objects.with_session_stats().get(pk=resp_data['id'])
         self.assertEqual(WorkSessionLabelSerializer(wsl).data, resp_data)
 
+    def test_create_existing(self):
+        wsl = self._create_work_session_label(name='existing')
+        self._create_work_session(ended_at=wsl.updated_at + dt.timedelta(minutes=10), duration=10).labels.add(wsl)
+
+        url = reverse('work-session-label-list')
+        response = self.client.post(url, data={'name': 'existing'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertIn('already have a label', response.content.decode())
+
+        response = self.client.post(url + '?get_or_create=true', data={'name': 'existing'})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), self._serialize(wsl)[0])
+
+        response = self.client.post(url + '?get_or_create=true', data={'name': 'new'})
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+        self.assertEqual(json.loads(response.content)['session_count'], 0)
+
     def test_get_list(self):
         wsl1 = self._create_work_session_label(name='first')
         wsl2 = self._create_work_session_label(name='second')
@@ -201,7 +1003,7 @@ class TestWorkSessionLabel(TestAPI):
         self.assertEqual(response.status_code, HTTP_200_OK)
 
         resp_data = json.loads(response.content)
-        self.assertEqual(WorkSessionLabelSerializer([wsl1, wsl2], many=True).data, resp_data['results'])
+        self.assertEqual(self._serialize(wsl1, wsl2), resp_data['results'])
 
     def test_get_only_owned_records(self):
         my_wsl = self._create_work_session_label()
@@ -215,7 +1017,7 @@ class TestWorkSessionLabel(TestAPI):
 
         resp_data = json.loads(response.content)
         self.assertEqual(resp_data['count'], 1)
-        self.assertEqual(WorkSessionLabelSerializer([my_wsl], many=True).data, resp_data['results'])
+        self.assertEqual(self._serialize(my_wsl), resp_data['results'])
 
     def test_search(self):
         wsl = self._create_work_session_label(name='job')
@@ -225,7 +1027,7 @@ class TestWorkSessionLabel(TestAPI):
         self.assertEqual(response.status_code, HTTP_200_OK)
 
         resp_data = json.loads(response.content)
-        self.assertEqual(WorkSessionLabelSerializer([wsl], many=True).data, resp_data['results'])
+        self.assertEqual(self._serialize(wsl), resp_data['results'])
 
     def test_get(self):
         wsl = self._create_work_session_label()
@@ -235,7 +1037,7 @@ class TestWorkSessionLabel(TestAPI):
         self.assertEqual(response.status_code, HTTP_200_OK)
 
         resp_data = json.loads(response.content)
-        self.assertEqual(WorkSessionLabelSerializer(wsl).data, resp_data)
+        self.assertEqual(self._serialize(wsl)[0], resp_data)
 
     def test_update_name(self):
         wsl = self._create_work_session_label(name='v1')
@@ -254,3 +1056,58 @@ class TestWorkSessionLabel(TestAPI):
         url = reverse('work-session-label', args=[wsl.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, HTTP_204_NO_CONTENT)
+
+    def test_session_stats(self):
+        wsl = self._create_work_session_label()
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        for duration in [30, 45, None]:
+            ended_at = duration and started_at + dt.timedelta(minutes=duration)
+            with freeze_time(started_at):
+                self._create_work_session(ended_at=ended_at, duration=duration).labels.add(wsl)
+        self._create_work_session_label(name='unused')
+
+        url = reverse('work-session-label-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        stats = {label['name']: (label['session_count'], label['total_duration']) for label in response.data['results']}
+        self.assertEqual(stats, {'test': (3, 75), 'unused': (0, 0)})
+
+    def test_session_stats_on_end(self):
+        wsl = self._create_work_session_label()
+        ws = self._create_work_session()
+        ws.labels.add(wsl)
+
+        url = reverse('work-session-label', args=[wsl.id])
+        self.assertEqual(self.client.get(url).data['total_duration'], 0)
+
+        with freeze_time(ws.started_at + dt.timedelta(minutes=20)):
+            self.client.post(reverse('work-session-end', args=[ws.id]))
+        self.assertEqual(self.client.get(url).data['total_duration'], 20)
+
+    def test_sessions(self):
+        wsl = self._create_work_session_label()
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        sessions = []
+        for hours in range(3):
+            with freeze_time(started_at + dt.timedelta(hours=hours)):
+                sessions.append(self._create_work_session())
+        for ws in sessions[1:]:
+            ws.labels.add(wsl)
+
+        url = reverse('work-session-label-sessions', args=[wsl.id])
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual([ws['id'] for ws in response.data['results']], [str(sessions[2].id)])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([ws['id'] for ws in response.data['results']], [str(sessions[1].id)])
+        self.assertEqual(response.data['results'][0]['label_details'], [{'id': str(wsl.id), 'name': wsl.name}])
+        self.assertIsNone(response.data['next'])
+
+    def test_sessions_of_another_user(self):
+        stub_user = get_user_model().objects.get(username='stub')
+        wsl = self._create_work_session_label(owner=stub_user)
+
+        url = reverse('work-session-label-sessions', args=[wsl.id])
+        self.assertEqual(self.client.get(url).status_code, HTTP_404_NOT_FOUND)
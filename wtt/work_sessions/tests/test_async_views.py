@@ -0,0 +1,113 @@
+import json
+
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import (
+    HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST,
+    HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND,
+)
+
+from ..models import WorkSession
+from ..serializers import WorkSessionSerializer
+from ..authentication import token_cache
+from .factories import TestFactories
+
+
+class TestAsyncWorkSession(TestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+
+        self._user = self._create_user(username='main test user')
+        self._other_user = self._create_user(username='other user')
+        self._label = self._create_work_session_label(owner=self._user)
+
+        token = Token.objects.create(user=self._user)
+        self._headers = {'Authorization': 'Token ' + token.key}
+
+    async def test_get_list(self):
+        ws1 = await WorkSession.objects.acreate(owner=self._user)
+        ws2 = await WorkSession.objects.acreate(owner=self._user)
+        await ws2.labels.aset([self._label])
+
+        sync_response = await self.async_client.get(reverse('work-session-list'), headers=self._headers)
+        response = await self.async_client.get(reverse('async-work-session-list'), headers=self._headers)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertEqual(resp_data['count'], 2)
+        self.assertEqual({ws['id'] for ws in resp_data['results']}, {str(ws1.pk), str(ws2.pk)})
+        self.assertEqual(resp_data['results'], json.loads(sync_response.content)['results'])
+
+    async def test_get_list_is_paginated_and_filtered(self):
+        for _ in range(3):
+            await WorkSession.objects.acreate(owner=self._user)
+
+        url = reverse('async-work-session-list')
+        response = await self.async_client.get(url, {'limit': 2}, headers=self._headers)
+        resp_data = json.loads(response.content)
+        self.assertEqual((resp_data['count'], len(resp_data['results'])), (3, 2))
+        self.assertIn('offset=2', resp_data['next'])
+
+        response = await self.async_client.get(url, {'started_at': '2100-01-01T00:00:00'}, headers=self._headers)
+        self.assertEqual(json.loads(response.content)['count'], 0)
+
+        response = await self.async_client.get(url, {'started_at': 'yesterday'}, headers=self._headers)
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+    async def test_get(self):
+        ws = await WorkSession.objects.acreate(owner=self._user)
+
+        response = await self.async_client.get(reverse('async-work-session', args=[ws.pk]), headers=self._headers)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['id'], str(ws.pk))
+
+    async def test_get_only_owned_records(self):
+        ws = await WorkSession.objects.acreate(owner=self._other_user)
+
+        response = await self.async_client.get(reverse('async-work-session', args=[ws.pk]), headers=self._headers)
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+
+    async def test_create(self):
+        response = await self.async_client.post(
+            reverse('async-work-session-list'),
+            {'labels': [str(self._label.pk)]},
+            content_type='application/json',
+            headers=self._headers,
+        )
+        self.assertEqual(response.status_code, HTTP_201_CREATED)
+
+        resp_data = json.loads(response.content)
+        ws = await WorkSession.objects.prefetch_related('labels').aget(pk=resp_data['id'])
+        self.assertEqual(ws.owner_id, self._user.pk)
+        self.assertEqual(WorkSessionSerializer(ws).data, resp_data)
+
+    async def test_end(self):
+        ws = await WorkSession.objects.acreate(owner=self._user)
+        url = reverse('async-work-session-end', args=[ws.pk])
+
+        response = await self.async_client.post(
+            url, {'note': 'done'}, content_type='application/json', headers=self._headers,
+        )
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        await ws.arefresh_from_db()
+        self.assertTrue(ws.ended())
+        self.assertEqual(ws.note, 'done')
+
+        response = await self.async_client.post(url, headers=self._headers)
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertIn('has been already ended', json.loads(response.content)['detail'])
+
+    async def test_requires_token(self):
+        url = reverse('async-work-session-list')
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+        response = await self.async_client.get(url, headers={'Authorization': 'Token wrong'})
+        self.assertEqual(response.status_code, HTTP_401_UNAUTHORIZED)
+        self.assertEqual(json.loads(response.content), {'detail': 'Invalid token.'})
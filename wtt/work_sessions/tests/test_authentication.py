@@ -0,0 +1,173 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from django.contrib.auth.models import update_last_login
+from django.core.cache import caches
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
+
+from freezegun import freeze_time
+
+from ..authentication import CachedTokenAuthentication, TokenCache, token_cache
+from .factories import TestFactories
+
+
+class TestTokenCache(TestCase):
+
+    def test_hits_and_misses(self):
+        cache = TokenCache(max_size=10, ttl=60)
+        self.assertIsNone(cache.get('key'))
+
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+    def test_ttl(self):
+        cache = TokenCache(max_size=10, ttl=60)
+
+        with freeze_time('2025-03-03 10:00:00') as frozen_time:
+            cache.set('key', 'value')
+            frozen_time.tick(59)
+            self.assertEqual(cache.get('key'), 'value')
+            frozen_time.tick(2)
+            self.assertIsNone(cache.get('key'))
+
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('first', 1)
+        cache.set('second', 2)
+        cache.get('first')
+        cache.set('third', 3)
+
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('first'), 1)
+        self.assertEqual(cache.get('third'), 3)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_shared_backend(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+
+        cache = TokenCache(max_size=10, ttl=60, backend='default')
+        cache.set('key', 'value')
+        self.assertEqual(cache.stats()['size'], 0)
+
+        # Another process has the same shared cache.
+        another_cache = TokenCache(max_size=10, ttl=60, backend='default')
+        self.assertEqual(another_cache.get('key'), 'value')
+        self.assertEqual(another_cache.stats()['shared_hits'], 1)
+
+        another_cache.invalidate('key')
+        self.assertIsNone(cache.get('key'))
+
+
+class TestCachedTokenAuthentication(APITestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+
+        self._user = self._create_user()
+        self._create_work_session(owner=self._user)
+        self._token = Token.objects.create(user=self._user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self._token.key)
+
+    def _get(self):
+        return self.client.get(reverse('work-session-list'))
+
+    def test_token_is_resolved_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._get().status_code, HTTP_200_OK)
+
+        # The same, but without the token query.
+        with self.assertNumQueries(len(queries) - 1):
+            self.assertEqual(self._get().status_code, HTTP_200_OK)
+
+        stats = token_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_deleted_token(self):
+        self._get()
+        self._token.delete()
+        self.assertEqual(self._get().status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user(self):
+        self._get()
+        self._user.is_active = False
+        self._user.save()
+        self.assertEqual(self._get().status_code, HTTP_401_UNAUTHORIZED)
+
+    def test_cached_user_is_copied(self):
+        authentication = CachedTokenAuthentication()
+        for _ in range(2):
+            user, _ = authentication.authenticate_credentials(self._token.key)
+            user.first_name = 'changed'
+
+        user, token = authentication.authenticate_credentials(self._token.key)
+        self.assertEqual(user.first_name, '')
+        self.assertIs(token.user, user)
+
+    def test_login_keeps_cached_tokens(self):
+        self._get()
+        update_last_login(None, self._user)
+        self.assertEqual(token_cache.stats()['size'], 1)
+
+        self._user.first_name = 'changed'
+        self._user.save()
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_stats_view(self):
+        url = reverse('token-cache-stats')
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_403_FORBIDDEN)
+
+        self._user.is_staff = True
+        self._user.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        resp_data = json.loads(response.content)
+        self.assertEqual(resp_data['size'], 1)
+        self.assertEqual(resp_data['misses'], 2)
+
+
+class TestCachedTokenAuthenticationConcurrency(APITransactionTestCase, TestFactories):
+
+    serialized_rollback = True
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+
+        self._user = self._create_user()
+        self._token = Token.objects.create(user=self._user)
+
+    def _get(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + self._token.key)
+        try:
+            return client.get(reverse('work-session-list')).status_code
+        finally:
+            connection.close()
+
+    def test_user_deactivated_while_authenticating(self):
+        with ThreadPoolExecutor(1) as executor:
+            with transaction.atomic():
+                self._user.is_active = False
+                self._user.save()
+
+                # Another request reads the user before the commit and caches it.
+                self.assertEqual(executor.submit(self._get).result(), HTTP_200_OK)
+
+            self.assertEqual(executor.submit(self._get).result(), HTTP_401_UNAUTHORIZED)
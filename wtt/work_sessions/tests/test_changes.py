@@ -0,0 +1,213 @@
+import io
+import json
+import datetime as dt
+from unittest import mock
+
+import psycopg
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from django.test import override_settings
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_410_GONE
+from freezegun import freeze_time
+
+from ..changes import get_horizon
+from ..models import WorkSessionTombstone
+from .factories import TestFactories
+
+
+@mock.patch('wtt.work_sessions.changes.CLOCK_MARGIN', dt.timedelta(0))
+class TestChanges(APITestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+
+        self._user = self._create_user()
+        token = Token.objects.create(user=self._user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def _get_changes(self, **params):
+        response = self.client.get(reverse('work-session-changes'), params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return json.loads(response.content)
+
+    def test_changes_since_cursor(self):
+        ws = self._create_work_session(owner=self._user)
+        deleted_ws = self._create_work_session(owner=self._user)
+        label = self._create_work_session_label(owner=self._user)
+        self._create_work_session(owner=self._create_user(username='other'))
+
+        changes = self._get_changes()
+        self.assertEqual({item['id'] for item in changes['sessions']}, {str(ws.pk), str(deleted_ws.pk)})
+        self.assertEqual([item['id'] for item in changes['labels']], [str(label.pk)])
+        self.assertEqual(changes['deleted'], [])
+        self.assertFalse(changes['has_more'])
+
+        changes = self._get_changes(cursor=changes['cursor'])
+        self.assertEqual((changes['sessions'], changes['labels'], changes['deleted']), ([], [], []))
+
+        deleted_ids = [str(deleted_ws.pk), str(label.pk)]
+        ws.end()
+        deleted_ws.delete()
+        label.delete()
+
+        changes = self._get_changes(cursor=changes['cursor'])
+        self.assertEqual([item['id'] for item in changes['sessions']], [str(ws.pk)])
+        self.assertIsNotNone(changes['sessions'][0]['ended_at'])
+        self.assertEqual(changes['labels'], [])
+        self.assertEqual(
+            [(item['kind'], item['id']) for item in changes['deleted']],
+            list(zip(['session', 'label'], deleted_ids)),
+        )
+
+    def test_changes_since_timestamp(self):
+        self._create_work_session(owner=self._user)
+        since = timezone.now()
+        ws = self._create_work_session(owner=self._user)
+
+        changes = self._get_changes(since=since.replace(tzinfo=None).isoformat())
+        self.assertEqual([item['id'] for item in changes['sessions']], [str(ws.pk)])
+
+    def test_pages(self):
+        # Imported sessions share the time of their transaction.
+        self.client.post(reverse('work-session-import'), data=[
+            {'started_at': f'2025-03-0{day}T10:00:00Z'} for day in range(1, 8)
+        ])
+
+        ids = []
+        changes = {'cursor': None, 'has_more': True}
+        while changes['has_more']:
+            params = {'limit': 3, 'cursor': changes['cursor']} if changes['cursor'] else {'limit': 3}
+            changes = self._get_changes(**params)
+            self.assertLessEqual(len(changes['sessions']), 3)
+            ids.extend(item['id'] for item in changes['sessions'])
+
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+
+    def test_labels_of_ended_sessions(self):
+        label = self._create_work_session_label(owner=self._user)
+        with freeze_time(timezone.now() - dt.timedelta(minutes=10)):
+            ws = self._create_work_session(owner=self._user)
+        ws.labels.add(label)
+        changes = self._get_changes()
+
+        ws.end()
+
+        changes = self._get_changes(cursor=changes['cursor'])
+        self.assertEqual(
+            [(item['id'], item['session_count'], item['total_duration']) for item in changes['labels']],
+            [(str(label.pk), 1, 10)],
+        )
+
+    def test_labels_of_deleted_sessions(self):
+        label = self._create_work_session_label(owner=self._user)
+        sessions = [self._create_work_session(owner=self._user) for _ in range(3)]
+        for ws in sessions:
+            ws.labels.add(label)
+        changes = self._get_changes()
+
+        self.client.delete(reverse('work-session', args=[sessions[0].pk]))
+        changes = self._get_changes(cursor=changes['cursor'])
+        self.assertEqual([(item['id'], item['session_count']) for item in changes['labels']], [(str(label.pk), 2)])
+
+        self.client.post(reverse('work-session-batch'), data={'operations': [
+            {'op': 'delete', 'id': ws.pk} for ws in sessions[1:]
+        ]})
+        changes = self._get_changes(cursor=changes['cursor'])
+        self.assertEqual([(item['id'], item['session_count']) for item in changes['labels']], [(str(label.pk), 0)])
+
+    def test_number_of_queries_does_not_depend_on_changes(self):
+        self._get_changes()
+        for _ in range(10):
+            self._create_work_session_label(owner=self._user, name=str(_)).work_sessions.add(
+                self._create_work_session(owner=self._user),
+            )
+
+        # Two for the horizon, one per source and the labels of the sessions.
+        with self.assertNumQueries(6):
+            self._get_changes()
+
+    def test_invalid_params(self):
+        for params in ({'cursor': 'nope'}, {'since': 'yesterday'}, {'limit': 0}, {'limit': 'ten'}):
+            response = self.client.get(reverse('work-session-changes'), params)
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST, params)
+
+    def test_too_old_positions(self):
+        since = timezone.now() - dt.timedelta(days=31)
+        response = self.client.get(reverse('work-session-changes'), {'since': since.replace(tzinfo=None).isoformat()})
+        self.assertEqual(response.status_code, HTTP_410_GONE)
+
+        cursor = self._get_changes()['cursor']
+        with override_settings(CHANGES={'TOMBSTONE_RETENTION_DAYS': 0}):
+            response = self.client.get(reverse('work-session-changes'), {'cursor': cursor})
+        self.assertEqual(response.status_code, HTTP_410_GONE)
+        self.assertIn('sync again', json.loads(response.content)['detail'])
+
+    def test_purge_tombstones_command(self):
+        for _ in range(3):
+            self._create_work_session(owner=self._user).delete()
+        WorkSessionTombstone.objects.filter(
+            pk__in=WorkSessionTombstone.objects.values('pk')[:2],
+        ).update(deleted_at=timezone.now() - dt.timedelta(days=31))
+
+        stdout = io.StringIO()
+        call_command('purge_tombstones', stdout=stdout)
+        self.assertEqual(stdout.getvalue().strip(), 'Deleted 2 tombstones older than 30 days.')
+        self.assertEqual(WorkSessionTombstone.objects.count(), 1)
+
+    def test_user_deletion_leaves_no_tombstones(self):
+        self._create_work_session(owner=self._user)
+        self._create_work_session_label(owner=self._user)
+
+        self._user.delete()
+        self.assertFalse(WorkSessionTombstone.objects.exists())
+
+
+@mock.patch('wtt.work_sessions.changes.CLOCK_MARGIN', dt.timedelta(0))
+class TestHorizon(APITestCase):
+
+    def _connect(self):
+        settings = connection.settings_dict
+        return psycopg.connect(
+            dbname=settings['NAME'], user=settings['USER'], password=settings['PASSWORD'],
+            host=settings['HOST'], port=settings['PORT'],
+        )
+
+    def test_open_transaction_of_another_connection(self):
+        with self._connect() as other:
+            # The transaction gets an id, as it would by writing.
+            xact_start = other.execute('SELECT now(), pg_current_xact_id()').fetchone()[0]
+
+            horizon, now = get_horizon()
+            self.assertLessEqual(horizon, xact_start)
+            self.assertGreater(now, xact_start)
+
+            other.commit()
+            self.assertGreater(get_horizon()[0], xact_start)
+
+    def test_idle_transaction_without_id(self):
+        with self._connect() as other:
+            # Nothing written and no snapshot held between statements.
+            xact_start = other.execute('SELECT now()').fetchone()[0]
+            self.assertGreater(get_horizon()[0], xact_start)
+
+    def test_lag_view(self):
+        user = get_user_model().objects.create_user('admin')
+        self.client.force_authenticate(user)
+        url = reverse('changes-horizon')
+        self.assertEqual(self.client.get(url).status_code, HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        with self._connect() as other:
+            other.execute('SELECT pg_current_xact_id()')
+            other.execute('SELECT pg_sleep(0.2)')
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertGreaterEqual(json.loads(response.content)['lag'], 0.2)
@@ -0,0 +1,117 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+
+from freezegun import freeze_time
+
+from ..authentication import token_cache
+from ..models import WorkSession, WorkSessionLabel
+from .factories import TestFactories
+
+
+class TestConditionalGet(APITestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+
+        self._user = self._create_user()
+        self._ws = self._create_work_session(owner=self._user)
+        self._label = self._create_work_session_label(owner=self._user, name='first')
+        token = Token.objects.create(user=self._user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def _assert_not_modified(self, url, etag, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def _assert_modified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_sessions(self):
+        for url in (reverse('work-session-list'), reverse('work-session', args=[self._ws.pk])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+            self.assertIn('Last-Modified', response)
+
+            # Only the state of the owner is read.
+            self._assert_not_modified(url, response['ETag'], queries=1)
+
+    def test_session_changes(self):
+        url = reverse('work-session-list')
+        etag = self.client.get(url)['ETag']
+
+        self._ws.end()
+        etag = self._assert_modified(url, etag)
+
+        self._label.name = 'renamed'
+        self._label.save()
+        etag = self._assert_modified(url, etag)
+
+        self._label.work_sessions.add(self._ws)
+        etag = self._assert_modified(url, etag)
+
+        self.client.post(reverse('work-session-import'), data=[{'started_at': '2025-03-03T10:00:00Z'}])
+        etag = self._assert_modified(url, etag)
+
+        self._ws.delete()
+        etag = self._assert_modified(url, etag)
+
+        self._assert_not_modified(url, etag, queries=1)
+
+    def test_other_owners_do_not_change_etag(self):
+        url = reverse('work-session-list')
+        etag = self.client.get(url)['ETag']
+
+        self._create_work_session(owner=self._create_user(username='other'))
+        self._assert_not_modified(url, etag, queries=1)
+
+    def test_labels(self):
+        for url in (reverse('work-session-label-list'), reverse('work-session-label', args=[self._label.pk])):
+            etag = self.client.get(url)['ETag']
+
+            # Only the state of the owner is read.
+            self._assert_not_modified(url, etag, queries=1)
+
+            self._ws.labels.add(self._label)
+            self._assert_modified(url, etag)
+
+    def test_if_modified_since_alone_is_not_trusted(self):
+        url = reverse('work-session-list')
+        last_modified = self.client.get(url)['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+    def _get_updated_at(self):
+        return (
+            WorkSession.objects.get(pk=self._ws.pk).updated_at,
+            WorkSessionLabel.objects.get(pk=self._label.pk).updated_at,
+        )
+
+    def test_labels_change_bumps_both_sides(self):
+        updated_at = self._get_updated_at()
+        self._ws.labels.add(self._label)
+        self.assertTrue(all(new > old for new, old in zip(self._get_updated_at(), updated_at)))
+
+        updated_at = self._get_updated_at()
+        self._label.work_sessions.clear()
+        self.assertTrue(all(new > old for new, old in zip(self._get_updated_at(), updated_at)))
+
+    def test_updated_at_is_set_by_database(self):
+        # The clock of this app server is far behind the one of the database.
+        with freeze_time('2020-01-01 10:00:00'):
+            self._label.name = 'renamed'
+            self._label.save()
+            label = self._create_work_session_label(owner=self._user, name='second')
+
+        self._label.refresh_from_db()
+        self.assertGreater(self._label.updated_at.year, 2020)
+        self.assertGreater(label.updated_at.year, 2020)
@@ -15,6 +15,14 @@ class TestWorkSessionAdminForm(TestCase, TestFactories):
         form = WorkSessionAdminForm(data={'owner': self._user, 'labels': [wsl.pk]})
         self.assertTrue(form.is_valid())
 
+    def test_validate_labels_with_one_query(self):
+        labels = [self._create_work_session_label(owner=self._user, name=str(i)) for i in range(30)]
+        form = WorkSessionAdminForm(data={'owner': self._user.pk, 'labels': [wsl.pk for wsl in labels]})
+
+        # The owner, the labels and the validation of the owner by the model.
+        with self.assertNumQueries(3):
+            self.assertTrue(form.is_valid())
+
     def test_forbid_to_create_with_other_user_label(self):
         another_user = self._create_user(username='another test user')
         another_user_wsl = self._create_work_session_label(owner=another_user)
@@ -0,0 +1,94 @@
+import io
+import os
+import json
+import tempfile
+import datetime as dt
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from ..models import WorkSession, WorkSessionDailyTotal
+from ..imports import import_work_sessions
+from .. import imports
+from .factories import TestFactories
+
+
+class TestImportWorkSessions(TestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        self._user = self._create_user()
+
+    def _make_rows(self, count):
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        return [{
+            'started_at': (started_at + dt.timedelta(hours=i)).isoformat(),
+            'ended_at': (started_at + dt.timedelta(hours=i, minutes=30)).isoformat(),
+            'labels': [f'label {i % 3}'],
+        } for i in range(count)]
+
+    def test_number_of_queries_does_not_depend_on_rows(self):
+        another_user = self._create_user(username='another test user')
+
+        with CaptureQueriesContext(connection) as few_rows_queries:
+            imported = import_work_sessions(another_user, self._make_rows(3))
+        self.assertEqual(imported, 3)
+
+        with CaptureQueriesContext(connection) as many_rows_queries:
+            imported = import_work_sessions(self._user, self._make_rows(300))
+        self.assertEqual(imported, 300)
+
+        self.assertEqual(len(few_rows_queries), len(many_rows_queries))
+        self.assertEqual(WorkSession.objects.filter(owner=self._user).count(), 300)
+        self.assertEqual(WorkSession.labels.through.objects.filter(worksession__owner=self._user).count(), 300)
+
+    def test_loads_in_batches(self):
+        with mock.patch.object(imports, 'IMPORT_BATCH_SIZE', 7):
+            imported = import_work_sessions(self._user, self._make_rows(20))
+
+        self.assertEqual(imported, 20)
+        self.assertEqual(WorkSession.objects.filter(owner=self._user).count(), 20)
+
+    def test_updates_daily_totals(self):
+        import_work_sessions(self._user, self._make_rows(20))
+
+        totals = WorkSessionDailyTotal.objects.filter(owner=self._user, label__isnull=True)
+        self.assertEqual(list(totals.values_list('day', 'sessions', 'duration')), [
+            (dt.date(2025, 3, 3), 14, 420),
+            (dt.date(2025, 3, 4), 6, 180),
+        ])
+
+    def test_command(self):
+        rows = self._make_rows(3)
+        path = self._write_ndjson(rows)
+
+        stdout = io.StringIO()
+        call_command('import_work_sessions', self._user.username, path, stdout=stdout)
+        self.assertIn('Imported 3 work sessions.', stdout.getvalue())
+        self.assertEqual(WorkSession.objects.filter(owner=self._user).count(), 3)
+
+    def test_command_with_invalid_rows(self):
+        path = self._write_ndjson(self._make_rows(2) + [{'started_at': 'now'}])
+
+        stderr = io.StringIO()
+        with self.assertRaisesMessage(CommandError, 'Nothing has been imported'):
+            call_command('import_work_sessions', self._user.username, path, stderr=stderr)
+        self.assertIn('Line 3: ', stderr.getvalue())
+        self.assertFalse(WorkSession.objects.filter(owner=self._user).exists())
+
+    def test_command_with_missing_file(self):
+        path = os.path.join(tempfile.gettempdir(), 'missing.ndjson')
+        with self.assertRaisesMessage(CommandError, f'Cannot read "{path}": No such file or directory.'):
+            call_command('import_work_sessions', self._user.username, path)
+
+    def _write_ndjson(self, rows):
+        file = tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            for row in rows:
+                file.write(json.dumps(row) + '\n')
+        return file.name
@@ -0,0 +1,144 @@
+import json
+
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.core.cache import caches
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+from ..label_cache import LabelResponseCache, label_cache
+from ..authentication import token_cache
+from ..models import ClockTimestamp, WorkSession, WorkSessionLabel
+from .factories import TestFactories
+
+
+class TestLabelResponseCache(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+
+    def test_keys_include_state(self):
+        cache = LabelResponseCache(ttl=60, backend='default')
+        cache.set(1, ('state',), '/labels/', 'data')
+
+        self.assertEqual(cache.get(1, ('state',), '/labels/'), 'data')
+        self.assertIsNone(cache.get(1, ('changed state',), '/labels/'))
+        self.assertIsNone(cache.get(2, ('state',), '/labels/'))
+        self.assertIsNone(cache.get(1, ('state',), '/labels/?search=first'))
+
+    def test_local_memory_by_default(self):
+        cache = LabelResponseCache.from_settings()
+        self.assertTrue(cache.enabled)
+        self.assertEqual(cache.backend, 'default')
+
+    @override_settings(LABEL_CACHE={'BACKEND': None, 'TTL': 60})
+    def test_disabled_without_backend(self):
+        self.assertFalse(LabelResponseCache.from_settings().enabled)
+
+
+class TestCachedLabelResponses(APITestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        caches[label_cache.backend].clear()
+        token_cache.clear()
+
+        self._user = self._create_user()
+        self._label = self._create_work_session_label(owner=self._user, name='first')
+        token = Token.objects.create(user=self._user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def _get_list(self):
+        return json.loads(self.client.get(reverse('work-session-label-list')).content)['results']
+
+    def _get(self):
+        return json.loads(self.client.get(reverse('work-session-label', args=[self._label.pk])).content)
+
+    def test_served_from_cache(self):
+        self._get_list()
+        self._get()
+
+        # Only the state of the owner is read, for the ETag.
+        with self.assertNumQueries(2):
+            self.assertEqual(self._get_list()[0]['name'], 'first')
+            self.assertEqual(self._get()['name'], 'first')
+
+    def test_cache_is_per_owner(self):
+        self._get_list()
+
+        other_user = self._create_user(username='other')
+        self._create_work_session_label(owner=other_user, name='other')
+        Token.objects.create(user=other_user, key='other')
+        self.client.credentials(HTTP_AUTHORIZATION='Token other')
+        self.assertEqual([label['name'] for label in self._get_list()], ['other'])
+
+    def test_label_changes(self):
+        self._get_list()
+        self._get()
+
+        self.client.post(reverse('work-session-label-list'), data={'name': 'second'})
+        self.assertEqual({label['name'] for label in self._get_list()}, {'first', 'second'})
+
+        self.client.patch(reverse('work-session-label', args=[self._label.pk]), data={'name': 'renamed'})
+        self.assertEqual(self._get()['name'], 'renamed')
+        self.assertEqual({label['name'] for label in self._get_list()}, {'renamed', 'second'})
+
+        self.client.delete(reverse('work-session-label', args=[self._label.pk]))
+        self.assertEqual([label['name'] for label in self._get_list()], ['second'])
+
+    def test_session_changes(self):
+        self._get()
+
+        response = self.client.post(reverse('work-session-list'), data={'labels': [self._label.pk]})
+        ws_id = json.loads(response.content)['id']
+        self.assertEqual(self._get()['session_count'], 1)
+
+        self._label.work_sessions.clear()
+        self.assertEqual(self._get()['session_count'], 0)
+
+        ws = WorkSession.objects.get(pk=ws_id)
+        ws.labels.add(self._label)
+        self.assertEqual(self._get()['session_count'], 1)
+
+        self.client.delete(reverse('work-session', args=[ws_id]))
+        self.assertEqual(self._get()['session_count'], 0)
+
+    def test_session_saves(self):
+        ws = self._create_work_session(owner=self._user)
+        ws.end()
+        ws.labels.add(self._label)
+        self.assertEqual(self._get_list()[0]['total_duration'], 0)
+
+        ws = WorkSession.objects.get(pk=ws.pk)
+        ws.duration = 500
+        ws.save()
+        self.assertEqual(self._get_list()[0]['total_duration'], 500)
+
+        # Other fields don't change the labels.
+        updated_at = WorkSessionLabel.objects.get(pk=self._label.pk).updated_at
+        ws.note = 'changed'
+        ws.save()
+        self.assertEqual(WorkSessionLabel.objects.get(pk=self._label.pk).updated_at, updated_at)
+
+    def test_changes_without_signals(self):
+        # As made by another process, whose cache is not this one.
+        self._get_list()
+        WorkSessionLabel.objects.filter(pk=self._label.pk).update(name='renamed', updated_at=ClockTimestamp())
+        self.assertEqual(self._get_list()[0]['name'], 'renamed')
+
+    def test_bulk_changes(self):
+        self._get_list()
+
+        self.client.post(reverse('work-session-batch'), data={'operations': [
+            {'op': 'create', 'data': {'labels': [self._label.pk]}},
+        ]})
+        self.assertEqual(self._get_list()[0]['session_count'], 1)
+
+        self.client.post(reverse('work-session-import'), data=[
+            {'started_at': '2025-03-03T10:00:00Z', 'labels': ['first', 'imported']},
+        ])
+        labels = {label['name']: label for label in self._get_list()}
+        self.assertEqual(labels['first']['session_count'], 2)
+        self.assertEqual(labels['imported']['session_count'], 1)
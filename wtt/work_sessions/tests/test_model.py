@@ -1,14 +1,20 @@
+import io
 import uuid
 import datetime as dt
+from unittest import mock
 
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.urls import reverse
 from django.utils import timezone
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
 
 from freezegun import freeze_time
 
-from ..models import WorkSession, WorkSessionLabel
+from ..models import WorkSession, WorkSessionLabel, WorkSessionDailyTotal, get_stub_user_id
 from .factories import TestFactories
 
 
@@ -29,6 +35,38 @@ class TestWorkSession(TestCase):
             self.assertEqual(ws.note, '')
             self.assertEqual(ws.owner.username, 'stub', 'Default user.')
 
+    def test_default_owner_is_read_once(self):
+        get_stub_user_id.cache_clear()
+
+        # The stub user, and the insert with its constraints checked in a savepoint.
+        with self.assertNumQueries(6):
+            WorkSession.objects.bulk_create([WorkSession() for _ in range(50)])
+
+    def test_default_owner_after_stub_user_is_replaced(self):
+        self.addCleanup(get_stub_user_id.cache_clear)
+        self._ws.owner.delete()
+
+        stub_user = get_user_model().objects.create_user('stub')
+        self.assertEqual(WorkSession().owner_id, stub_user.pk)
+
+    def test_default_owner_replaced_by_another_process(self):
+        self.addCleanup(get_stub_user_id.cache_clear)
+        stale_id = get_stub_user_id()
+
+        # Another process replaces the stub user, so this one keeps its id.
+        with mock.patch.object(get_stub_user_id, 'cache_clear'):
+            get_user_model().objects.get(pk=stale_id).delete()
+            stub_user = get_user_model().objects.create_user('stub')
+
+        self.assertEqual(WorkSession.objects.create().owner_id, stub_user.pk)
+
+        with mock.patch.object(get_stub_user_id, 'cache_clear'):
+            stub_user.delete()
+            stub_user = get_user_model().objects.create_user('stub')
+
+        sessions = WorkSession.objects.bulk_create([WorkSession() for _ in range(2)])
+        self.assertEqual({ws.owner_id for ws in sessions}, {stub_user.pk})
+
     def test_should_close_session(self):
         duration = 45
         now = self._ws.started_at + dt.timedelta(minutes=duration)
@@ -38,6 +76,28 @@ class TestWorkSession(TestCase):
             self.assertEqual(self._ws.ended_at, now)
             self.assertEqual(self._ws.duration, duration)
 
+    def test_should_close_session_with_note(self):
+        self._ws.end(note='done')
+        self.assertEqual(self._ws.note, 'done')
+
+        self._ws.refresh_from_db()
+        self.assertEqual(self._ws.note, 'done')
+        self.assertEqual(self._ws.duration, 0)
+
+    def test_should_close_session_with_a_clock_behind(self):
+        with freeze_time(self._ws.started_at - dt.timedelta(milliseconds=500)):
+            self._ws.end()
+
+        self._ws.refresh_from_db()
+        self.assertEqual(self._ws.ended_at, self._ws.started_at)
+        self.assertEqual(self._ws.duration, 0)
+
+    def test_should_forbid_to_end_a_session_ended_elsewhere(self):
+        WorkSession.objects.get(pk=self._ws.pk).end()
+
+        with self.assertRaisesMessage(ValidationError, 'already ended'):
+            self._ws.end()
+
     def test_should_forbid_to_end_an_already_ended_session(self):
         self._ws.end()
 
@@ -45,6 +105,64 @@ class TestWorkSession(TestCase):
             self._ws.end()
 
 
+class TestWorkSessionQuerySet(TestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        self._user = self._create_user()
+        self._started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+
+        with freeze_time(self._started_at):
+            self._running = [self._create_work_session(owner=self._user) for _ in range(3)]
+            self._ended = self._create_work_session(owner=self._user)
+        with freeze_time(self._started_at + dt.timedelta(minutes=5)):
+            self._ended.end()
+
+    def test_end(self):
+        with freeze_time(self._started_at + dt.timedelta(minutes=30)):
+            with CaptureQueriesContext(connection) as queries:
+                ended = WorkSession.objects.filter(owner=self._user).end()
+        self.assertEqual(ended, 3)
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE wtt_work_session ')]
+        self.assertEqual(len(updates), 1)
+
+        sessions = WorkSession.objects.filter(owner=self._user).in_bulk()
+        for ws in self._running:
+            self.assertEqual(sessions[ws.pk].ended_at, self._started_at + dt.timedelta(minutes=30))
+            self.assertEqual(sessions[ws.pk].duration, 30)
+        self.assertEqual(sessions[self._ended.pk].duration, 5)
+
+        total = WorkSessionDailyTotal.objects.get(owner=self._user, label=None)
+        self.assertEqual((total.sessions, total.duration), (4, 95))
+
+    def test_end_nothing(self):
+        self.assertEqual(WorkSession.objects.filter(pk=self._ended.pk).end(), 0)
+        self.assertEqual(WorkSession.objects.none().end(), 0)
+
+    def test_admin_action(self):
+        admin_user = get_user_model().objects.create_superuser('admin')
+        self.client.force_login(admin_user)
+
+        url = reverse('admin:work_sessions_worksession_changelist')
+        response = self.client.post(url, {
+            'action': 'complete_sessions',
+            '_selected_action': [ws.pk for ws in self._running[:2]] + [self._ended.pk],
+        }, follow=True)
+        self.assertContains(response, '2 work sessions have been completed.')
+        self.assertEqual(WorkSession.objects.filter(owner=self._user, ended_at__isnull=True).count(), 1)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        with freeze_time(self._started_at + dt.timedelta(hours=2)):
+            call_command('end_work_sessions', '--older-than', '3', stdout=stdout)
+            call_command('end_work_sessions', '--older-than', '1', '--user', self._user.username, stdout=stdout)
+        self.assertEqual(stdout.getvalue().splitlines(), ['Ended 0 work sessions.', 'Ended 3 work sessions.'])
+
+        with self.assertRaisesMessage(CommandError, 'does not exist'):
+            call_command('end_work_sessions', '--started-before', '2025-03-03T12:00', '--user', 'nobody')
+
+
 class TestWorkSessionLabel(TestCase, TestFactories):
 
     def setUp(self):
@@ -71,3 +189,18 @@ class TestWorkSessionLabel(TestCase, TestFactories):
         # Must raise an error because I already has a label with this name.
         with self.assertRaisesRegex(IntegrityError, 'unique_name_owner'):
             WorkSessionLabel.objects.create(name=name, owner=self._user)
+
+    def test_get_or_create_many(self):
+        existing = WorkSessionLabel.objects.create(name='first', owner=self._user)
+        another_user = self._create_user(username='test2')
+        WorkSessionLabel.objects.create(name='second', owner=another_user)
+
+        with self.assertNumQueries(1):
+            labels, created = WorkSessionLabel.objects.get_or_create_many(self._user, ['first', 'second', 'second'])
+        self.assertEqual(created, {'second'})
+        self.assertEqual(labels['first'], existing)
+        self.assertEqual((labels['second'].name, labels['second'].owner_id), ('second', self._user.pk))
+        self.assertEqual(WorkSessionLabel.objects.filter(owner=self._user).count(), 2)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(WorkSessionLabel.objects.get_or_create_many(self._user, []), ({}, set()))
@@ -0,0 +1,120 @@
+import re
+import datetime as dt
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..models import WorkSession, WorkSessionLabel
+from ..reports import build_overlaps_report
+from ..views import WorkSessionViewSet
+from .factories import TestFactories
+
+
+class TestQueryPlans(TestCase, TestFactories):
+    """
+    The tables are small in tests, so sequential scans are disabled to see
+    which indexes the planner is able to use for a query.
+
+    The user and another one have a session a day for a year, and the
+    sessions of the user have 10 of their 500 labels. The tables are analyzed
+    so that the planner tells apart the indexes on the owner and the labels.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self._user = self._create_user()
+        other_user = self._create_user(username='other')
+
+        for _ in range(3):
+            self._create_work_session(owner=self._user).end()
+        self._create_work_session(owner=self._user)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {WorkSession._meta.db_table} (id, owner_id, started_at, ended_at, duration, note) '
+                f"SELECT gen_random_uuid(), owner_id, now() - day * interval '1 day', "
+                f"now() - day * interval '1 day' + interval '1 hour', 60, '' "
+                f'FROM unnest(%s) AS owner_id, generate_series(1, 365) AS day',
+                [[self._user.pk, other_user.pk]],
+            )
+
+        self._labels = WorkSessionLabel.objects.bulk_create(
+            WorkSessionLabel(name=f'label {i}', owner=self._user) for i in range(500)
+        )
+        through = WorkSession.labels.through
+        through.objects.bulk_create(
+            through(worksession_id=ws_id, worksessionlabel_id=label.pk)
+            for ws_id in WorkSession.objects.filter(owner=self._user).values_list('pk', flat=True)
+            for label in self._labels[:10]
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {WorkSession._meta.db_table}, {through._meta.db_table}')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def _get_view_queryset(self, params=None):
+        request = Request(APIRequestFactory().get('/', params))
+        request.user = self._user
+
+        view = WorkSessionViewSet(request=request, format_kwarg=None)
+        return view.get_queryset()
+
+    def test_list_uses_owner_started_at_index(self):
+        plan = self._get_view_queryset()[:50].explain()
+        self.assertIn('ws_owner_started_at_idx', plan)
+
+    def test_date_range_filter_uses_owner_started_at_index(self):
+        now = dt.datetime.now()
+        queryset = self._get_view_queryset({
+            'started_at': (now - dt.timedelta(days=7)).isoformat(),
+            'ended_at': now.isoformat(),
+        })
+        plan = queryset.explain()
+        self.assertIn('ws_owner_started_at_idx', plan)
+
+    def test_label_filters_are_semi_joins_on_label_indexes(self):
+        ids = ','.join(str(label.pk) for label in self._labels)
+        for param in ['labels', 'labels_all']:
+            with self.subTest(param=param):
+                plan = self._get_view_queryset({param: ids}).explain()
+                # The through table is read once with an index, rather than
+                # joined once per label.
+                self.assertEqual(len(re.findall(r'Scan (?:using \S+ )?on wtt_work_session_labels\b', plan)), 1)
+                self.assertNotIn('Seq Scan', plan)
+
+        # Sessions having all the labels are counted from an index on the
+        # label ids, either wsl_label_session_idx or the one of the foreign key.
+        plan = self._get_view_queryset({'labels_all': ids}).explain()
+        self.assertRegex(plan, r'(?:wsl_label_session_idx|wtt_work_session_labels_worksessionlabel_id_\w+)\b')
+
+    def test_period_filters_use_owner_period_index(self):
+        now = dt.datetime.now()
+        for params in [
+            {'active_at': now.isoformat()},
+            {'overlaps': f'{(now - dt.timedelta(hours=1)).isoformat()},{now.isoformat()}'},
+        ]:
+            with self.subTest(params=params):
+                plan = self._get_view_queryset(params).explain()
+                self.assertIn('ws_owner_period_gist', plan)
+
+    def test_overlaps_report_uses_owner_period_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            build_overlaps_report(self._get_view_queryset())
+
+        with connection.cursor() as cursor:
+            # Otherwise the few rows are rather read once and compared in memory.
+            cursor.execute('SET LOCAL enable_material = off')
+            cursor.execute(f'EXPLAIN {queries[0]["sql"]}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        # Each session is matched with the others by the index, rather than
+        # by comparing every pair.
+        self.assertIn('ws_owner_period_gist', plan)
+        self.assertRegex(plan, r'Index Cond: .*period && ')
+
+    def test_running_session_lookup_uses_partial_index(self):
+        queryset = WorkSession.objects.filter(owner=self._user, ended_at__isnull=True)
+        plan = queryset.explain()
+        self.assertIn('ws_owner_running_idx', plan)
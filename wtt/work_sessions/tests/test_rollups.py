@@ -0,0 +1,155 @@
+import io
+import threading
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.core.management import call_command
+
+from freezegun import freeze_time
+
+from ..models import WorkSession, WorkSessionDailyTotal
+from ..rollups import refresh_daily_totals
+from .factories import TestFactories
+
+
+class TestWorkSessionDailyTotals(TestCase, TestFactories):
+
+    def setUp(self):
+        super().setUp()
+        self._user = self._create_user()
+        self._label = self._create_work_session_label(owner=self._user)
+
+    def _create_ended_work_session(self, started_at, minutes):
+        with freeze_time(started_at):
+            ws = self._create_work_session(owner=self._user)
+        with freeze_time(started_at + dt.timedelta(minutes=minutes)):
+            ws.end()
+        return ws
+
+    def _get_totals(self):
+        return list(
+            WorkSessionDailyTotal.objects
+            .filter(owner=self._user)
+            .order_by('day', 'label__name')
+            .values_list('day', 'label__name', 'sessions', 'duration')
+        )
+
+    def test_running_sessions_are_not_counted(self):
+        self._create_work_session(owner=self._user)
+        self.assertEqual(self._get_totals(), [])
+
+    def test_end(self):
+        started_at = dt.datetime(2025, 3, 3, 23, 50, tzinfo=dt.timezone.utc)
+        self._create_ended_work_session(started_at, 20)
+        self._create_ended_work_session(started_at, 10)
+        self.assertEqual(self._get_totals(), [(dt.date(2025, 3, 3), None, 2, 30)])
+
+    def test_labels_change(self):
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        ws = self._create_ended_work_session(started_at, 20)
+
+        ws.labels.add(self._label)
+        self.assertEqual(self._get_totals(), [
+            (dt.date(2025, 3, 3), 'test', 1, 20),
+            (dt.date(2025, 3, 3), None, 1, 20),
+        ])
+
+        ws.labels.remove(self._label)
+        self.assertEqual(self._get_totals(), [(dt.date(2025, 3, 3), None, 1, 20)])
+
+        self._label.work_sessions.add(ws)
+        self._label.work_sessions.clear()
+        self.assertEqual(self._get_totals(), [(dt.date(2025, 3, 3), None, 1, 20)])
+
+    def test_delete(self):
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        ws = self._create_ended_work_session(started_at, 20)
+        ws.labels.add(self._label)
+        self._create_ended_work_session(started_at, 5)
+
+        ws.delete()
+        self.assertEqual(self._get_totals(), [(dt.date(2025, 3, 3), None, 1, 5)])
+
+    def test_saves(self):
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        ws = self._create_ended_work_session(started_at, 20)
+
+        # The note is not counted, so the daily totals are not refreshed.
+        ws.note = 'changed'
+        with self.assertNumQueries(1):
+            ws.save()
+
+        ws.started_at = started_at + dt.timedelta(days=1)
+        ws.ended_at = ws.started_at + dt.timedelta(minutes=30)
+        ws.duration = 30
+        ws.save()
+        self.assertEqual(self._get_totals(), [(dt.date(2025, 3, 4), None, 1, 30)])
+
+        other_user = self._create_user(username='other')
+        ws.owner = other_user
+        ws.save()
+        self.assertEqual(self._get_totals(), [])
+        self.assertEqual(WorkSessionDailyTotal.objects.get(owner=other_user).duration, 30)
+
+    def test_label_delete(self):
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        ws = self._create_ended_work_session(started_at, 20)
+        ws.labels.add(self._label)
+
+        self._label.delete()
+        self.assertEqual(self._get_totals(), [(dt.date(2025, 3, 3), None, 1, 20)])
+
+    def test_rebuild_command(self):
+        for day in [1, 2, 3]:
+            ws = self._create_ended_work_session(dt.datetime(2025, 3, day, 10, tzinfo=dt.timezone.utc), day)
+            ws.labels.add(self._label)
+        expected = self._get_totals()
+
+        # Changes that bypass the signals make the daily totals stale.
+        WorkSession.objects.filter(owner=self._user).update(duration=60)
+
+        call_command('rebuild_daily_totals', '--from', '2025-03-02', '--to', '2025-03-02', stdout=io.StringIO())
+        totals = self._get_totals()
+        self.assertEqual(totals[0], expected[0])
+        self.assertEqual(totals[2:4], [
+            (dt.date(2025, 3, 2), 'test', 1, 60),
+            (dt.date(2025, 3, 2), None, 1, 60),
+        ])
+        self.assertEqual(totals[4], expected[4])
+
+        call_command('rebuild_daily_totals', stdout=io.StringIO())
+        self.assertEqual([row[3] for row in self._get_totals()], [60] * 6)
+
+
+class TestWorkSessionDailyTotalsConcurrency(TransactionTestCase, TestFactories):
+    # The stub user is created by a migration.
+    serialized_rollback = True
+
+    threads = 20
+
+    def test_concurrent_refreshes(self):
+        user = self._create_user()
+        label = self._create_work_session_label(owner=user)
+        started_at = dt.datetime(2025, 3, 3, 10, tzinfo=dt.timezone.utc)
+        with freeze_time(started_at):
+            ws = self._create_work_session(owner=user)
+        with freeze_time(started_at + dt.timedelta(minutes=20)):
+            ws.end()
+        ws.labels.add(label)
+
+        barrier = threading.Barrier(self.threads)
+
+        def refresh(index):
+            try:
+                barrier.wait()
+                refresh_daily_totals(user.pk, [started_at.date()])
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            list(executor.map(refresh, range(self.threads)))
+
+        totals = WorkSessionDailyTotal.objects.filter(owner=user).values_list('label_id', 'sessions', 'duration')
+        self.assertCountEqual(totals, [(None, 1, 20), (label.pk, 1, 20)])
@@ -0,0 +1,102 @@
+import json
+
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
+
+from ..models import WorkSession
+from ..search import search_work_sessions
+from .test_api import TestAPI
+
+
+class TestSearch(TestAPI):
+
+    def setUp(self):
+        super().setUp()
+
+        self._notes = {}
+        for note in [
+            'Reviewed the running meetings',
+            'Meeting about meetings, then another meeting',
+            'Wrote <b>docs</b> & tests for the meeting tool',
+            'Unrelated gardening',
+        ]:
+            ws = self._create_work_session()
+            ws.end()
+            ws.note = note
+            ws.save()
+            self._notes[ws.pk] = note
+
+    def _search(self, **params):
+        response = self.client.get(reverse('work-session-list'), params)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        return json.loads(response.content)['results']
+
+    def test_fts_stems_and_ranks(self):
+        results = self._search(search='meeting', search_mode='fts')
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['note'], 'Meeting about meetings, then another meeting')
+        self.assertNotIn('highlight', results[0])
+
+        results = self._search(search='run meeting', search_mode='fts')
+        self.assertEqual([item['note'] for item in results], ['Reviewed the running meetings'])
+
+    def test_hybrid_matches_typos_too(self):
+        self.assertEqual(self._search(search='meetin', search_mode='fts'), [])
+
+        results = self._search(search='meetin', search_mode='hybrid')
+        self.assertEqual(len(results), 3)
+
+        results = self._search(search='gardening', search_mode='hybrid')
+        self.assertEqual([item['note'] for item in results], ['Unrelated gardening'])
+
+    def test_highlight_is_escaped(self):
+        results = self._search(search='docs', search_mode='fts', highlight='true')
+
+        self.assertEqual(
+            results[0]['highlight'],
+            'Wrote &lt;b&gt;<mark>docs</mark>&lt;/b&gt; &amp; tests for the meeting tool',
+        )
+
+    def test_trigram_mode_is_default(self):
+        self.assertEqual(self._search(search='gardenin'), self._search(search='gardenin', search_mode='trigram'))
+        self.assertEqual(len(self._search(search='gardenin')), 1)
+
+    def test_reports_and_export_accept_search_modes(self):
+        response = self.client.get(reverse('work-session-reports'), {
+            'search': 'meeting', 'search_mode': 'hybrid', 'highlight': 'true', 'group_by': 'label',
+        })
+        self.assertEqual(response.status_code, HTTP_200_OK)
+
+        response = self.client.get(reverse('work-session-reports'), {'search': 'meeting', 'search_mode': 'fts'})
+        self.assertEqual(json.loads(response.content)['results'][0]['sessions'], 3)
+
+        response = self.client.get(reverse('work-session-export'), {'search': 'meeting', 'search_mode': 'fts'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+    def test_ranked_search_is_not_cursor_paginated(self):
+        for mode in ['fts', 'hybrid']:
+            response = self.client.get(reverse('work-session-list'), {
+                'search': 'meeting', 'search_mode': mode, 'pagination': 'cursor',
+            })
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+            self.assertIn('cursor', json.loads(response.content)[0])
+
+        response = self.client.get(reverse('work-session-list'), {'search': 'gardenin', 'pagination': 'cursor'})
+        self.assertEqual(len(json.loads(response.content)['results']), 1)
+
+    def test_invalid_mode(self):
+        response = self.client.get(reverse('work-session-list'), {'search': 'meeting', 'search_mode': 'regex'})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class TestSearchQueryPlan(TestCase):
+
+    def test_fts_uses_note_vector_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+        plan = search_work_sessions(WorkSession.objects.all(), 'meeting', 'fts').explain()
+        self.assertIn('note_vector_gin', plan)
@@ -1,11 +1,17 @@
+import uuid
 import datetime as dt
 
 from django.test import TestCase
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.test import APIRequestFactory
+from rest_framework.renderers import JSONRenderer
 
 from ..models import WorkSession, WorkSessionLabel
-from ..serializers import WorkSessionSerializer, WorkSessionLabelSerializer, WorkSessionLabelDetailsSerializer
+from ..serializers import (
+    WORK_SESSION_VALUES, WorkSessionSerializer, WorkSessionLabelSerializer, WorkSessionLabelDetailsSerializer,
+    serialize_work_session_rows,
+)
 from .factories import TestFactories
 
 
@@ -53,6 +59,63 @@ class TestWorkSessionSerializer(TestCase, TestFactories):
         self.assertFalse(is_valid)
         self.assertEqual(serializer.errors['labels'][0].code, 'does_not_exist')
 
+    def test_validate_labels_with_one_query(self):
+        labels = [self._create_work_session_label(owner=self._user, name=str(i)) for i in range(30)]
+        request = APIRequestFactory().get('/')
+        request.user = self._user
+
+        serializer = WorkSessionSerializer(data={'labels': [wsl.id for wsl in labels]}, context={'request': request})
+        with self.assertNumQueries(1):
+            serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.validated_data['labels'], labels)
+
+    def test_invalid_labels(self):
+        missing = uuid.uuid4()
+        for labels, error in [
+            ([self._wsl.id, missing], f'Invalid pk "{missing}" - object does not exist.'),
+            (['nope'], '“nope” is not a valid UUID.'),
+            ([True], 'Incorrect type. Expected pk value, received bool.'),
+            (str(self._wsl.id), 'Expected a list of items but got type "str".'),
+        ]:
+            serializer = WorkSessionSerializer(data={'labels': labels})
+            self.assertFalse(serializer.is_valid())
+            self.assertEqual(serializer.errors['labels'], [error])
+
+
+class TestSerializeWorkSessionRows(TestCase, TestFactories):
+
+    def test_same_output_as_serializer(self):
+        user = self._create_user()
+        labels = [self._create_work_session_label(owner=user, name=name) for name in ['b', 'a', 'c']]
+        sessions = [
+            self._create_work_session(owner=user),
+            self._create_work_session(owner=user, note='Notes with "quotes", ünïcode & <tags>'),
+            self._create_work_session(owner=user),
+        ]
+        sessions[0].labels.set(labels)
+        sessions[1].labels.set(labels[:1])
+        sessions[2].end()
+
+        queryset = WorkSession.objects.filter(owner=user)
+        for tz in ['UTC', 'Europe/Berlin']:
+            with timezone.override(tz):
+                self.assertEqual(
+                    JSONRenderer().render(serialize_work_session_rows(queryset.values(*WORK_SESSION_VALUES))),
+                    JSONRenderer().render(WorkSessionSerializer(queryset.prefetch_related('labels'), many=True).data),
+                )
+
+    def test_labels_with_one_query(self):
+        user = self._create_user()
+        label = self._create_work_session_label(owner=user)
+        for _ in range(10):
+            self._create_work_session(owner=user).labels.add(label)
+
+        rows = list(WorkSession.objects.filter(owner=user).values(*WORK_SESSION_VALUES))
+        with self.assertNumQueries(1):
+            serialize_work_session_rows(rows)
+        with self.assertNumQueries(0):
+            self.assertEqual(serialize_work_session_rows([]), [])
+
 
 class TestWorkSessionLabelSerializer(TestCase, TestFactories):
 
@@ -81,12 +144,11 @@ class TestWorkSessionLabelSerializer(TestCase, TestFactories):
 
         ws = self._create_work_session(owner=self._user)
         ws.labels.set([wsl])
-        serialized_work_sessions = [ws.id]
+        ended = self._create_work_session(owner=self._user, ended_at=ws.started_at + dt.timedelta(hours=1), duration=30)
+        ended.labels.set([wsl])
 
-        data = WorkSessionLabelSerializer(wsl).data
-        self.assertEqual(data['id'], str(wsl.id))
-        self.assertEqual(data['name'], wsl.name)
-        self.assertEqual(data['work_sessions'], serialized_work_sessions)
+        data = WorkSessionLabelSerializer(WorkSessionLabel.objects.with_session_stats().get(pk=wsl.pk)).data
+        self.assertEqual(data, {'id': str(wsl.id), 'name': wsl.name, 'session_count': 2, 'total_duration': 30})
 
 
 class TestWorkSessionLabelDetailsSerializer(TestCase, TestFactories):
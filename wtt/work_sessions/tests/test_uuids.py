@@ -0,0 +1,29 @@
+import time
+import uuid
+
+from django.test import SimpleTestCase
+
+from ..uuids import uuid7
+
+
+class TestUuid7(SimpleTestCase):
+
+    def test_version_and_variant(self):
+        value = uuid7()
+        self.assertIsInstance(value, uuid.UUID)
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+
+    def test_embeds_timestamp(self):
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+        self.assertTrue(before <= value.int >> 80 <= after)
+
+    def test_ordered_by_creation_time(self):
+        values = []
+        for _ in range(5):
+            values.append(uuid7())
+            time.sleep(0.001)
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
@@ -1,12 +1,25 @@
 from django.urls import path
 
 from .views import WorkSessionViewSet, WorkSessionLabelViewSet
+from .async_views import AsyncWorkSessionListView, AsyncWorkSessionView, AsyncWorkSessionEndView
 
 urlpatterns = [
     path('', WorkSessionViewSet.as_view({'get': 'list', 'post': 'create'}), name='work-session-list'),
+    path('reports/', WorkSessionViewSet.as_view({'get': 'reports'}), name='work-session-reports'),
+    path('overlaps/', WorkSessionViewSet.as_view({'get': 'overlaps'}), name='work-session-overlaps'),
+    path('export/', WorkSessionViewSet.as_view({'get': 'export'}), name='work-session-export'),
+    path('import/', WorkSessionViewSet.as_view({'post': 'import_sessions'}), name='work-session-import'),
+    path('changes/', WorkSessionViewSet.as_view({'get': 'changes'}), name='work-session-changes'),
+    path('end/', WorkSessionViewSet.as_view({'post': 'end_sessions'}), name='work-session-end-all'),
+    path('batch/', WorkSessionViewSet.as_view({'post': 'batch'}), name='work-session-batch'),
     path('<uuid:pk>/', WorkSessionViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'}), name='work-session'),
     path('<uuid:pk>/end/', WorkSessionViewSet.as_view({'post': 'end'}), name='work-session-end'),
 
+    path('async/', AsyncWorkSessionListView.as_view(), name='async-work-session-list'),
+    path('async/<uuid:pk>/', AsyncWorkSessionView.as_view(), name='async-work-session'),
+    path('async/<uuid:pk>/end/', AsyncWorkSessionEndView.as_view(), name='async-work-session-end'),
+
     path('labels/', WorkSessionLabelViewSet.as_view({'get': 'list', 'post': 'create'}), name='work-session-label-list'),
     path('labels/<uuid:pk>/', WorkSessionLabelViewSet.as_view({'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'}), name='work-session-label'),
+    path('labels/<uuid:pk>/sessions/', WorkSessionLabelViewSet.as_view({'get': 'sessions'}), name='work-session-label-sessions'),
 ]
@@ -0,0 +1,24 @@
+import os
+import time
+import uuid
+
+
+def uuid7():
+    """
+    Generate a time-ordered UUID (version 7, RFC 9562).
+
+    The first 48 bits are a Unix timestamp in milliseconds and the next 12 bits
+    are the sub-millisecond fraction, so new keys land at the right edge of a
+    B-tree index instead of at random pages.
+    """
+    nanoseconds = time.time_ns()
+    milliseconds, remainder = divmod(nanoseconds, 1_000_000)
+    sub_milliseconds = remainder * 4096 // 1_000_000
+    random_bits = int.from_bytes(os.urandom(8)) & 0x3FFF_FFFF_FFFF_FFFF
+
+    value = (milliseconds & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= sub_milliseconds << 64
+    value |= 0b10 << 62
+    value |= random_bits
+    return uuid.UUID(int=value)
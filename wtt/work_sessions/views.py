@@ -1,42 +1,94 @@
+import uuid
 import datetime as dt
+import functools
+import zoneinfo
 
 from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Count, Exists, OuterRef
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.core.exceptions import ValidationError
 
 from rest_framework import permissions, authentication
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.status import (
+    HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT,
+    HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_410_GONE, HTTP_424_FAILED_DEPENDENCY,
+)
 from rest_framework.exceptions import ValidationError as DRFValidationError
 
-from .models import WorkSession, WorkSessionLabel
-from .serializers import WorkSessionSerializer, WorkSessionLabelSerializer
+from .authentication import CachedTokenAuthentication, token_cache
+from .conditional import ConditionalGetMixin
+from .label_cache import label_cache
+from .models import ClockTimestamp, WorkSession, WorkSessionLabel, WorkSessionDailyTotal
+from .serializers import (
+    WorkSessionSerializer, WorkSessionLabelSerializer, WorkSessionBatchSerializer, WorkSessionTombstoneSerializer,
+    WORK_SESSION_VALUES, serialize_work_session_rows,
+)
+from .pagination import WorkSessionCursorPagination
+from .changes import (
+    CHANGES_PAGE_SIZE, CHANGES_MAX_PAGE_SIZE, CursorTooOld, InvalidCursor, collect_tombstones, get_changes, get_horizon,
+)
+from .exports import EXPORT_FORMATS, stream_in_chunks
+from .imports import ImportValidationError, import_work_sessions
+from .search import SEARCH_MODES, search_work_sessions
+from .reports import (
+    REPORT_GROUPS, OVERLAPS_PAGE_SIZE, OVERLAPS_MAX_PAGE_SIZE,
+    build_report, build_daily_totals_report, build_overlaps_report, decode_overlaps_cursor, encode_overlaps_cursor,
+)
+from .rollups import ROLLUP_TZ
 
 
-class WorkSessionViewSet(ModelViewSet):
+class WorkSessionViewSet(ConditionalGetMixin, ModelViewSet):
     serializer_class = WorkSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+
+    # Sessions are read with a server-side cursor and their labels are
+    # prefetched once per chunk of this size.
+    export_chunk_size = 1000
+
+    @property
+    def paginator(self):
+        # Clients opt in to cursor pagination with "?pagination=cursor", see
+        # WorkSessionCursorPagination for what the cursor holds. The parameter
+        # is kept in the next/previous links, so they stay in this mode.
+        if not hasattr(self, '_paginator') and self.request.query_params.get('pagination') == 'cursor':
+            self._paginator = WorkSessionCursorPagination()
+        return super().paginator
 
     def get_queryset(self):
         user = self.request.user
-        params = self.request.query_params
-        queryset = WorkSession.objects.filter(owner=user)
+        queryset = WorkSession.objects.filter(owner=user).prefetch_related('labels')
+        return filter_work_sessions(queryset, self.request.query_params)
 
-        search = params.get('search')
-        if search:
-            queryset = queryset.filter(note__trigram_word_similar=search)
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(self.list_rows, request, *args, **kwargs)
 
-        started_at = params.get('started_at')
-        if started_at:
-            queryset = queryset.filter(started_at__gte=try_to_parse_datetime_string(started_at))
+    def list_rows(self, request, *args, **kwargs):
+        # The same response as ListModelMixin.list(), serialized from rows
+        # of values rather than from model instances.
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
 
-        ended_at = params.get('ended_at')
-        if ended_at:
-            queryset = queryset.filter(ended_at__lte=try_to_parse_datetime_string(ended_at))
+        # The cursor pagination would replace the order by rank of the search.
+        if isinstance(self.paginator, WorkSessionCursorPagination) and 'search_rank' in queryset.query.annotations:
+            raise DRFValidationError('Ranked search results cannot be paginated with a cursor.')
 
-        return queryset
+        fields = WORK_SESSION_VALUES + [name for name in ['note_highlight'] if name in queryset.query.annotations]
+        queryset = queryset.values(*fields)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_work_session_rows(page))
+
+        return Response(serialize_work_session_rows(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(super().retrieve, request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -47,42 +99,447 @@ class WorkSessionViewSet(ModelViewSet):
 
         with transaction.atomic():
             try:
-                ws.end()
+                serializer = end_work_session(ws, request.data if request.body else {})
             except ValidationError as exc:
                 return Response({'detail': str(exc)}, status=HTTP_400_BAD_REQUEST)
 
-            data = request.data if request.body else {}
-            serializer = WorkSessionSerializer(ws, data=data)
-            serializer.is_valid(raise_exception=True)
+            return Response(serializer.data)
 
-            new_note = serializer.validated_data.get('note')
-            if new_note:
-                ws.note = new_note
-                ws.save()
+    @action(detail=False, methods=['post'], url_path='end')
+    def end_sessions(self, request):
+        # Every running session selected by the filters of the list.
+        ended = self.get_queryset().end()
+        return Response({'ended': ended})
 
-            return Response(serializer.data)
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        serializer = WorkSessionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data['operations']
+
+        # All the sessions the operations refer to are read in one query. The
+        # filters of the list don't apply to a batch.
+        ids = {operation['id'] for operation in operations if 'id' in operation}
+        owned = WorkSession.objects.filter(owner=request.user).prefetch_related('labels')
+        sessions = owned.filter(pk__in=ids).in_bulk()
+
+        context = self.get_serializer_context()
+        results = []
+        to_create = []
+        to_end = {}
+        to_delete = set()
+
+        with transaction.atomic():
+            for operation in operations:
+                op, data = operation['op'], operation['data']
+
+                if op == 'create':
+                    serializer = WorkSessionSerializer(data=data, context=context)
+                    if serializer.is_valid():
+                        to_create.append((len(results), serializer.validated_data))
+                        results.append({'status': HTTP_201_CREATED})
+                    else:
+                        results.append({'status': HTTP_400_BAD_REQUEST, 'errors': serializer.errors})
+                    continue
+
+                # A session queued to be ended is ended before another
+                # operation on it, and read again.
+                if operation['id'] in to_end:
+                    end_queued_work_sessions(owned, to_end, results)
+                    sessions.update(owned.filter(pk=operation['id']).in_bulk())
+
+                ws = sessions.get(operation['id'])
+                if ws is None or ws.pk in to_delete:
+                    results.append({'status': HTTP_404_NOT_FOUND, 'errors': {'detail': 'Not found.'}})
+                    continue
+
+                try:
+                    if op == 'patch':
+                        serializer = WorkSessionSerializer(ws, data=data, partial=True, context=context)
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                    elif op == 'end':
+                        serializer = WorkSessionSerializer(ws, data=data, context={'ending': True})
+                        serializer.is_valid(raise_exception=True)
+                        # Sessions ended without a note are ended together.
+                        if serializer.validated_data.get('note'):
+                            ws.end(note=serializer.validated_data['note'])
+                        else:
+                            to_end[ws.pk] = len(results)
+                    elif op == 'delete':
+                        to_delete.add(ws.pk)
+                except ValidationError as exc:
+                    results.append({'status': HTTP_400_BAD_REQUEST, 'errors': {'detail': str(exc)}})
+                except DRFValidationError as exc:
+                    results.append({'status': HTTP_400_BAD_REQUEST, 'errors': exc.detail})
+                else:
+                    status = HTTP_204_NO_CONTENT if op == 'delete' else HTTP_200_OK
+                    results.append({'status': status, 'id': ws.pk})
+
+            end_queued_work_sessions(owned, to_end, results)
+
+            if any(result['status'] >= HTTP_400_BAD_REQUEST for result in results):
+                transaction.set_rollback(True)
+                not_applied = {'status': HTTP_424_FAILED_DEPENDENCY, 'errors': {'detail': 'Not applied.'}}
+                return Response(
+                    {
+                        'detail': 'No operations have been applied.',
+                        'results': [
+                            result if result['status'] >= HTTP_400_BAD_REQUEST else not_applied for result in results
+                        ],
+                    },
+                    status=HTTP_400_BAD_REQUEST,
+                )
+
+            # New sessions and their labels are inserted with two statements,
+            # deleted sessions are removed with one.
+            created = WorkSession.objects.bulk_create([WorkSession(owner=request.user) for _ in to_create])
+            WorkSession.labels.through.objects.bulk_create([
+                WorkSession.labels.through(worksession_id=ws.pk, worksessionlabel_id=label.pk)
+                for ws, (_, validated_data) in zip(created, to_create)
+                for label in validated_data.get('labels', [])
+            ])
+            label_ids = {label.pk for _, validated_data in to_create for label in validated_data.get('labels', [])}
+            if label_ids:
+                WorkSessionLabel.objects.filter(pk__in=label_ids).update(updated_at=ClockTimestamp())
+            for ws, (index, _) in zip(created, to_create):
+                results[index] = {'status': HTTP_201_CREATED, 'id': ws.pk}
+
+            if to_delete:
+                with collect_tombstones():
+                    WorkSession.objects.filter(pk__in=to_delete).delete()
+
+        # Return the final state of every created or changed session.
+        changed = owned.filter(
+            pk__in=[result['id'] for result in results if result['status'] != HTTP_204_NO_CONTENT],
+        ).in_bulk()
+        for result in results:
+            ws = changed.get(result.pop('id'))
+            if ws:
+                result['data'] = WorkSessionSerializer(ws).data
+
+        return Response({'results': results})
+
+    @action(detail=False)
+    def reports(self, request):
+        params = request.query_params
+
+        group_by = params.get('group_by', 'day')
+        if group_by not in REPORT_GROUPS:
+            raise DRFValidationError(f'"{group_by}" is not a valid group. Choose one of: {", ".join(REPORT_GROUPS)}.')
+
+        tz = try_to_parse_timezone(params.get('tz', 'UTC'))
+
+        # The daily totals answer the report if the filters select whole UTC days.
+        started_at = params.get('started_at')
+        started_at = started_at and try_to_parse_datetime_string(started_at)
+        use_daily_totals = (
+            tz.utcoffset(None) == ROLLUP_TZ.utcoffset(None)
+            and not params.get('search')
+            and not params.get('ended_at')
+            and not params.get('labels')
+            and not params.get('labels_all')
+            and not params.get('active_at')
+            and not params.get('overlaps')
+            and (not started_at or started_at.time() == dt.time())
+        )
+
+        if use_daily_totals:
+            queryset = WorkSessionDailyTotal.objects.filter(owner=request.user)
+            if started_at:
+                queryset = queryset.filter(day__gte=started_at.date())
+            results = build_daily_totals_report(queryset, group_by)
+        else:
+            results = build_report(self.get_queryset(), group_by, tz)
+
+        return Response({'group_by': group_by, 'tz': str(tz), 'results': results})
+
+    @action(detail=False)
+    def overlaps(self, request):
+        params = request.query_params
+        limit = try_to_parse_limit(params.get('limit', OVERLAPS_PAGE_SIZE), OVERLAPS_MAX_PAGE_SIZE)
+        after = try_to_parse_overlaps_cursor(params['cursor']) if params.get('cursor') else None
+
+        results, last = build_overlaps_report(self.get_queryset(), limit, after)
+        return Response({
+            'results': results,
+            'cursor': last and encode_overlaps_cursor(last),
+            'has_more': last is not None,
+        })
+
+    @action(detail=False)
+    def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise DRFValidationError(f'"{output}" is not a valid output format. Choose one of: {", ".join(EXPORT_FORMATS)}.')
+
+        stream, content_type = EXPORT_FORMATS[output]
+        sessions = self.get_queryset().iterator(chunk_size=self.export_chunk_size)
+        rows = (WorkSessionSerializer(ws).data for ws in sessions)
+
+        # Under ASGI, Django reads a sync iterator into a list before sending it.
+        content = stream(rows)
+        if isinstance(request._request, ASGIRequest):
+            content = stream_in_chunks(content, self.export_chunk_size)
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="work_sessions.{output}"'
+        return response
+
+    @action(detail=False)
+    def changes(self, request):
+        params = request.query_params
+
+        since = params.get('since')
+        since = since and try_to_parse_datetime_string(since)
+
+        limit = try_to_parse_limit(params.get('limit', CHANGES_PAGE_SIZE), CHANGES_MAX_PAGE_SIZE)
+
+        try:
+            changes, cursor, has_more = get_changes(request.user, params.get('cursor'), since, limit)
+        except CursorTooOld as exc:
+            return Response({'detail': str(exc)}, status=HTTP_410_GONE)
+        except InvalidCursor as exc:
+            raise DRFValidationError(str(exc))
+
+        return Response({
+            'sessions': WorkSessionSerializer(changes['sessions'], many=True).data,
+            'labels': WorkSessionLabelSerializer(changes['labels'], many=True).data,
+            'deleted': WorkSessionTombstoneSerializer(changes['deleted'], many=True).data,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_sessions(self, request):
+        if not isinstance(request.data, list):
+            raise DRFValidationError('Expected a list of work sessions.')
 
+        try:
+            imported = import_work_sessions(request.user, request.data)
+        except ImportValidationError as exc:
+            return Response({'errors': exc.errors}, status=HTTP_400_BAD_REQUEST)
 
-class WorkSessionLabelViewSet(ModelViewSet):
+        return Response({'imported': imported}, status=HTTP_201_CREATED)
+
+
+class WorkSessionLabelViewSet(ConditionalGetMixin, ModelViewSet):
     serializer_class = WorkSessionLabelSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
 
     def get_queryset(self):
         user = self.request.user
         queryset = WorkSessionLabel.objects.filter(owner=user)
 
+        # The sessions are listed page by page, not counted.
+        if self.action != 'sessions':
+            queryset = queryset.with_session_stats()
+
         search = self.request.query_params.get('search')
         if search:
             queryset = queryset.filter(name__trigram_word_similar=search)
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        view = functools.partial(self.get_cached_response, super().list)
+        return self.get_conditional_response(view, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        view = functools.partial(self.get_cached_response, super().retrieve)
+        return self.get_conditional_response(view, request, *args, **kwargs)
+
+    def get_cached_response(self, view, request, *args, **kwargs):
+        if not label_cache.enabled:
+            return view(request, *args, **kwargs)
+
+        # The state is read before the labels, by get_conditional_response().
+        url = request.build_absolute_uri()
+
+        data = label_cache.get(request.user.pk, self.owner_state, url)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == HTTP_200_OK:
+            label_cache.set(request.user.pk, self.owner_state, url, response.data)
+        return response
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # With "?get_or_create=true", creating a label that already exists
+        # returns it with 200 OK instead of failing.
+        context['get_or_create'] = self.request.query_params.get('get_or_create', '').lower() in ('1', 'true')
+        return context
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=HTTP_201_CREATED if serializer.created else HTTP_200_OK)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @action(detail=True)
+    def sessions(self, request, pk):
+        label = self.get_object()
+        queryset = label.work_sessions.prefetch_related('labels')
+
+        paginator = WorkSessionCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = WorkSessionSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+
+
+class TokenCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
+
+    def get(self, request):
+        return Response(token_cache.stats())
+
+
+class ChangesHorizonView(APIView):
+    """
+    How far the horizon of the change feed is behind the clock of the
+    database, in seconds. It grows while a transaction is left open.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
+
+    def get(self, request):
+        horizon, now = get_horizon()
+        return Response({'horizon': horizon, 'lag': (now - horizon).total_seconds()})
+
 def try_to_parse_datetime_string(value):
     try:
         return dt.datetime.fromisoformat(value).replace(tzinfo=dt.timezone.utc)
     except Exception:
         raise DRFValidationError(f'"{value}" is not a valid ISO 8601 formated datetime string.')
+
+def try_to_parse_datetime_range(value):
+    """
+    Returns the range of two comma-separated datetimes, either of which may be
+    omitted for a range without that bound.
+    """
+    bounds = value.split(',')
+    if len(bounds) != 2:
+        raise DRFValidationError(f'"{value}" is not a valid range of two comma-separated datetimes.')
+    return DateTimeTZRange(*(try_to_parse_datetime_string(bound) if bound else None for bound in bounds))
+
+def try_to_parse_limit(value, max_value):
+    if not str(value).isdigit() or int(value) == 0:
+        raise DRFValidationError(f'"{value}" is not a valid limit.')
+    return min(int(value), max_value)
+
+def try_to_parse_overlaps_cursor(value):
+    try:
+        return decode_overlaps_cursor(value)
+    except (TypeError, ValueError):
+        raise DRFValidationError(f'"{value}" is not a valid cursor.')
+
+def try_to_parse_timezone(value):
+    try:
+        return zoneinfo.ZoneInfo(value)
+    except Exception:
+        raise DRFValidationError(f'"{value}" is not a valid IANA time zone name.')
+
+def try_to_parse_label_ids(values):
+    """
+    Returns the set of label ids from query parameter values, each of which
+    may hold several ids separated by commas.
+    """
+    ids = set()
+    for value in filter(None, ','.join(values).split(',')):
+        try:
+            ids.add(uuid.UUID(value.strip()))
+        except ValueError:
+            raise DRFValidationError(f'"{value}" is not a valid label id.')
+    return ids
+
+def filter_work_sessions(queryset, params):
+    search = params.get('search')
+    if search:
+        mode = params.get('search_mode', 'trigram')
+        if mode not in SEARCH_MODES:
+            raise DRFValidationError(f'"{mode}" is not a valid search mode. Choose one of: {", ".join(SEARCH_MODES)}.')
+
+        highlight = params.get('highlight', '').lower() in ('1', 'true')
+        queryset = search_work_sessions(queryset, search, mode, highlight)
+
+    started_at = params.get('started_at')
+    if started_at:
+        queryset = queryset.filter(started_at__gte=try_to_parse_datetime_string(started_at))
+
+    ended_at = params.get('ended_at')
+    if ended_at:
+        queryset = queryset.filter(ended_at__lte=try_to_parse_datetime_string(ended_at))
+
+    # Both are answered by the ws_owner_period_gist index.
+    active_at = params.get('active_at')
+    if active_at:
+        queryset = queryset.filter(period__contains=try_to_parse_datetime_string(active_at))
+
+    overlaps = params.get('overlaps')
+    if overlaps:
+        queryset = queryset.filter(period__overlap=try_to_parse_datetime_range(overlaps))
+
+    # Both label filters are semi-joins on the through table, answered from
+    # the wsl_label_session_idx index without joining it once per label.
+    through = WorkSession.labels.through
+
+    ids = try_to_parse_label_ids(params.getlist('labels'))
+    if ids:
+        queryset = queryset.filter(Exists(
+            through.objects.filter(worksession_id=OuterRef('pk'), worksessionlabel_id__in=ids),
+        ))
+
+    ids = try_to_parse_label_ids(params.getlist('labels_all'))
+    if ids:
+        queryset = queryset.filter(pk__in=(
+            through.objects
+            .filter(worksessionlabel_id__in=ids)
+            .values('worksession_id')
+            .annotate(labels_count=Count('*'))
+            .filter(labels_count=len(ids))
+            .values('worksession_id')
+        ))
+
+    return queryset
+
+def end_queued_work_sessions(queryset, to_end, results):
+    """
+    End the sessions of the queryset whose ids are the keys of to_end with
+    one UPDATE, and replace the result of the operation of each, at the
+    index of its value, with an error if it had already ended. The sessions
+    are locked first, so none can be ended concurrently in between.
+    """
+    running = set(
+        queryset.filter(pk__in=to_end, ended_at__isnull=True)
+        .prefetch_related(None).select_for_update().order_by('pk').values_list('pk', flat=True)
+    )
+    if running:
+        WorkSession.objects.filter(pk__in=running).end()
+
+    for pk, index in to_end.items():
+        if pk not in running:
+            results[index] = {
+                'status': HTTP_400_BAD_REQUEST,
+                'errors': {'detail': f'The session {pk} has been already ended.'},
+            }
+    to_end.clear()
+
+def end_work_session(ws, data):
+    """
+    End the session and set the note from the data, if any, with one query.
+    Raises DRF's ValidationError if the data are not valid and Django's one
+    if the session has already ended.
+    """
+    serializer = WorkSessionSerializer(ws, data=data, context={'ending': True})
+    serializer.is_valid(raise_exception=True)
+
+    ws.end(note=serializer.validated_data.get('note') or None)
+
+    return serializer